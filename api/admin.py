@@ -21,7 +21,7 @@ class LandingPageImageAdmin(VersionAdmin):
     It also ensures that the image is treated as a read-only field.
     """
 
-    list_display = ["thumbnail_list_display", "dimensions", "image_name", "updated_on"]
+    list_display = ["thumbnail_list_display", "dimensions", "image_name", "processing_status", "updated_on"]
     fields = ["image_display", "image"]
     readonly_fields = ["image_display"]  # Ensure image_thumbnail is treated as a read-only field,
     ordering = ["-updated_on"]
@@ -48,8 +48,9 @@ class LandingPageImageAdmin(VersionAdmin):
         Returns:
             str: HTML string displaying the width and height of the image.
         """
-        width, height = obj.image.width, obj.image.height
-        return format_html("<p>{} x {}</p>", width, height)
+        if obj.image_width is None:
+            return None
+        return format_html("<p>{} x {}</p>", obj.image_width, obj.image_height)
 
     def thumbnail_list_display(self, obj):
         """
@@ -61,7 +62,7 @@ class LandingPageImageAdmin(VersionAdmin):
         Returns:
             str: HTML representation of the thumbnail.
         """
-        return format_html('<img src="{}" width="75" />', obj.thumbnail.url)
+        return format_html('<img src="{}" width="75" />', obj.served_thumbnail.url)
 
     def image_name(self, obj):
         """
@@ -117,7 +118,7 @@ class ProductImageInline(admin.TabularInline):
                 instance does not have a 'url' attribute.
         """
 
-        return format_html('<img src="{}" width="75" />', obj.thumbnail.url)
+        return format_html('<img src="{}" width="75" />', obj.served_thumbnail.url)
 
 
 @admin.register(Product)
@@ -153,16 +154,28 @@ class ProductImageAdmin(VersionAdmin):
     to the admin interface for ProductImage model.
     """
 
-    list_display = ("image_thumbnail_list", "product", "order", "image", "updated_on", "dimensions", 'image_file_size')
-    list_filter = ("product",)
+    list_display = (
+        "image_thumbnail_list",
+        "product",
+        "order",
+        "image",
+        "updated_on",
+        "dimensions",
+        'image_file_size',
+        "processing_status",
+    )
+    list_filter = ("product", "processing_status")
     search_fields = ("product__name", "image")
     fields = ["image_thumbnail", "image", "product", "order", "caption"]
     readonly_fields = ["image_thumbnail"]  # Ensure image_thumbnail is treated as a read-only field
     ordering = ["-updated_on"]
     list_per_page = 20
+    list_select_related = ["product"]
 
     def image_file_size(self, obj):
-        img_mb = obj.image.size / 1048576
+        if obj.image_bytes is None:
+            return None
+        img_mb = obj.image_bytes / 1048576
         too_big = img_mb > 1
         return format_html(f'<p style="color: {'red' if too_big == True else 'black'};">{round(img_mb, 3)} mb</p>')
 
@@ -176,7 +189,7 @@ class ProductImageAdmin(VersionAdmin):
         Returns:
             str: A string of HTML displaying the thumbnail image.
         """
-        return format_html('<img src="{}" height="40"  />', obj.thumbnail.url)
+        return format_html('<img src="{}" height="40"  />', obj.served_thumbnail.url)
 
     def image_thumbnail(self, obj):
         """
@@ -188,7 +201,7 @@ class ProductImageAdmin(VersionAdmin):
         Returns:
             str: A string of HTML displaying the thumbnail image.
         """
-        return format_html('<img src="{}" width="300"  />', obj.thumbnail.url)
+        return format_html('<img src="{}" width="300"  />', obj.served_thumbnail.url)
 
     def dimensions(self, obj):
         """
@@ -200,8 +213,9 @@ class ProductImageAdmin(VersionAdmin):
         Returns:
             str: A string of HTML displaying the width and height of the image.
         """
-        width, height = obj.image.width, obj.image.height
-        return format_html("<p>{} x {}</p>", width, height)
+        if obj.image_width is None:
+            return None
+        return format_html("<p>{} x {}</p>", obj.image_width, obj.image_height)
 
 
 class MenuListItemInline(admin.TabularInline):
@@ -230,7 +244,7 @@ class MenuListItemInline(admin.TabularInline):
         Returns:
         str: HTML string that represents the image thumbnail.
         """
-        return format_html('<img src="{}" width="75" />', obj.image.url)
+        return format_html('<img src="{}" width="75" />', obj.served_thumbnail.url)
 
 
 @admin.register(MenuList)
@@ -258,16 +272,29 @@ class MenuListItemAdmin(VersionAdmin):
 
     """
 
-    list_display = ("name", "menu_list", "order", "image", "get_absolute_url_link", 'dimensions', 'image_file_size', "updated_on")
+    list_display = (
+        "name",
+        "menu_list",
+        "order",
+        "image",
+        "get_absolute_url_link",
+        "dimensions",
+        "image_file_size",
+        "processing_status",
+        "updated_on",
+    )
     list_filter = ("menu_list",)
     search_fields = ("name", "menu_list__name", "image")
     fields = ["name", "menu_list", "image_thumbnail", "image", "url", "link_health", "order"]
     readonly_fields = ["image_thumbnail", "link_health"]  # Ensure image_thumbnail is treated as a read-only field
     ordering = ["-updated_on"]
     list_per_page = 25
+    list_select_related = ["menu_list"]
 
     def image_file_size(self, obj):
-        img_mb = obj.image.size / 1048576
+        if obj.image_bytes is None:
+            return None
+        img_mb = obj.image_bytes / 1048576
         too_big = img_mb > 1
         return format_html(f'<p style="color: {'red' if too_big == True else 'black'};">{round(img_mb, 3)}mb</p>')
 
@@ -283,8 +310,9 @@ class MenuListItemAdmin(VersionAdmin):
         Returns:
             str: HTML string displaying the width and height of the image.
         """
-        width, height = obj.image.width, obj.image.height
-        return format_html("<p>{} x {}</p>", width, height)
+        if obj.image_width is None:
+            return None
+        return format_html("<p>{} x {}</p>", obj.image_width, obj.image_height)
 
 
 
@@ -298,7 +326,7 @@ class MenuListItemAdmin(VersionAdmin):
         Returns:
         str: HTML string that represents the image thumbnail.
         """
-        return format_html('<img src="{}" width="75" />', obj.image.url)
+        return format_html('<img src="{}" width="75" />', obj.served_thumbnail.url)
 
     def link_health(self, obj):
         """
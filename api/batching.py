@@ -0,0 +1,44 @@
+import threading
+
+from django.db import transaction
+
+
+class OnCommitBatch:
+    """
+    Collects items added during a transaction and hands them to ``flush`` once, as a set,
+    after the transaction commits. Outside a transaction items are flushed straight away.
+
+    Rolled back transactions drop their pending items along with their on_commit callbacks.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self.local = threading.local()
+
+    def add(self, *items):
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            self.flush(set(items))
+            return
+
+        pending = getattr(self.local, "pending", None)
+        if pending is None or not self._is_registered(connection, pending):
+            pending = self.local.pending = _PendingItems(self)
+            transaction.on_commit(pending.commit)
+        pending.update(items)
+
+    @staticmethod
+    def _is_registered(connection, pending):
+        # A rollback discards the callback without running it, which leaves a stale batch behind.
+        return any(entry[1] == pending.commit for entry in connection.run_on_commit)
+
+
+class _PendingItems(set):
+    def __init__(self, batch):
+        super().__init__()
+        self.batch = batch
+
+    def commit(self):
+        if getattr(self.batch.local, "pending", None) is self:
+            self.batch.local.pending = None
+        self.batch.flush(set(self))
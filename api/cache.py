@@ -0,0 +1,123 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import stats
+
+# Bump the version when the shape of cached entries changes.
+CATALOG_KEY_PREFIX = "api:catalog:v4:"
+CATALOG_VERSION_KEY = "api:catalog-version"
+SLUG_VERSION_KEY_PREFIX = "api:catalog-slug-version:"
+TREE_KEY_PREFIX = "api:tree:"
+
+CACHE_HITS = "catalog_cache_hits"
+CACHE_MISSES = "catalog_cache_misses"
+
+
+def slug_version_key(slug):
+    return SLUG_VERSION_KEY_PREFIX + slug
+
+
+def catalog_cache_key(slug, version):
+    return f"{CATALOG_KEY_PREFIX}{slug}:{version}"
+
+
+def get_slug_versions(slugs):
+    """
+    The version each slug's cache entry is currently keyed under, in one cache round trip once
+    they have all been set.
+    """
+    keys = {slug_version_key(slug): slug for slug in set(slugs)}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, slug in keys.items():
+        if slug not in versions:
+            versions[slug] = get_version(key)
+    return versions
+
+
+def get_cached_entry(slug):
+    """
+    Return ``(entry, version)`` for a canonical slug, with ``None`` for the entry on a miss.
+
+    Entries are dicts holding the record ``kind`` and its published JSON ``content`` with the
+    ``etag`` and ``last_modified`` validators. An entry made after a miss is stored under the
+    ``version`` returned here, which was read before the database was.
+    """
+    version = get_slug_versions([slug])[slug]
+    entry = cache.get(catalog_cache_key(slug, version))
+    stats.incr(CACHE_MISSES if entry is None else CACHE_HITS)
+    return entry, version
+
+
+def set_cached_entry(slug, version, entry):
+    cache.set(catalog_cache_key(slug, version), entry, timeout=settings.API_CACHE_TIMEOUT)
+
+
+def get_cached_entries(slugs):
+    """
+    ``get_cached_entry`` for many slugs in two cache round trips: a dict of the entries found,
+    leaving out the misses, and one of the version of every slug.
+    """
+    versions = get_slug_versions(slugs)
+    keys = {catalog_cache_key(slug, version): slug for slug, version in versions.items()}
+    found = cache.get_many(keys)
+    stats.incr(CACHE_HITS, len(found))
+    stats.incr(CACHE_MISSES, len(keys) - len(found))
+    return {keys[key]: entry for key, entry in found.items()}, versions
+
+
+def set_cached_entries(entries, versions):
+    cache.set_many(
+        {catalog_cache_key(slug, versions[slug]): entry for slug, entry in entries.items()},
+        timeout=settings.API_CACHE_TIMEOUT,
+    )
+
+
+def retire_cached_entries(slugs):
+    """
+    Retire the cached entries for the given slugs by moving them to a new version. Callers run
+    this after their transaction commits. A reader that loaded the old data before then still
+    stores it under the version it read first, where nothing looks for it any more.
+    """
+    bump_versions([slug_version_key(slug) for slug in set(slugs) if slug])
+
+
+def get_version(key):
+    """
+    A generation number stored under ``key``, for keying caches that are retired all at once.
+    """
+    version = cache.get(key)
+    if version is None:
+        # Any fresh value works, as long as it differs from the ones keyed before an eviction.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_versions(keys):
+    """
+    ``bump_version`` for many keys in one cache round trip.
+    """
+    version = time.time_ns()
+    if keys:
+        cache.set_many({key: version for key in keys}, timeout=None)
+
+
+def get_catalog_version():
+    """
+    A number that changes whenever any catalog record is republished.
+    """
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def tree_cache_key(root, depth):
+    return f"{TREE_KEY_PREFIX}{get_catalog_version()}:{root}:{depth}"
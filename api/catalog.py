@@ -0,0 +1,139 @@
+from django.db.models import CharField, Prefetch, TextField, Value
+from django.db.models.functions import Cast
+
+from .conditional import make_etag
+from .models import MenuList, MenuListItem, Product, ProductImage, PublishedPayload, slugify_name
+
+# Legacy urls whose slug never matched the record name; maps the requested slug to the canonical one.
+SLUG_ALIASES = {
+    "robe-tile-coffe-table": "robe-tile-coffee-table",
+}
+
+MENU_LIST = PublishedPayload.MENU_LIST
+PRODUCT = PublishedPayload.PRODUCT
+
+CATALOG_MODELS = {MENU_LIST: MenuList, PRODUCT: Product}
+
+
+def normalize_slug(slug):
+    """
+    Turn a requested slug into the canonical form stored in ``MenuList.slug`` / ``Product.slug``.
+    """
+    slug = slugify_name(slug)
+    return SLUG_ALIASES.get(slug, slug)
+
+
+def slug_from_url(url):
+    """
+    Canonical slug a ``MenuListItem.url`` such as ``/list/sofas-collection`` or ``/product/lake-bench``
+    points at, or ``None`` for outside links.
+    """
+    if not url or url.startswith("http"):
+        return None
+    parts = [part for part in url.split("/") if part not in ["", "list", "product"]]
+    return normalize_slug(parts[0]) if parts else None
+
+
+def resolve_slug(slug):
+    """
+    Find the MenuList or Product for a requested slug with a single indexed query.
+
+    Returns a ``(kind, pk)`` tuple, or ``None`` when nothing matches. Menu lists take
+    precedence over products that share a slug, as they always have.
+    """
+    slug = normalize_slug(slug)
+    return resolve_slugs([slug]).get(slug)
+
+
+def resolve_slugs(slugs):
+    """
+    ``resolve_slug`` for many canonical slugs in one query: a dict of slug to ``(kind, pk)``
+    that leaves out the slugs nothing matches.
+    """
+    slugs = set(slugs)
+    menu_lists = MenuList.objects.filter(slug__in=slugs).values(
+        "pk", "slug", kind=Value(MENU_LIST, output_field=CharField())
+    )
+    products = Product.objects.filter(slug__in=slugs).values(
+        "pk", "slug", kind=Value(PRODUCT, output_field=CharField())
+    )
+
+    matches = {}
+    for row in menu_lists.union(products, all=True):
+        if row["kind"] == MENU_LIST or row["slug"] not in matches:
+            matches[row["slug"]] = row["kind"], row["pk"]
+    return matches
+
+
+def read_queryset(kind):
+    """
+    Queryset for serializing a catalog record: only the columns the serializers and cache
+    invalidation need, with the nested rows fetched in one extra query however many there are.
+    ``meta`` is read as its JSON text, ``meta_json``, for the renderer to copy as it is.
+    """
+    if kind == MENU_LIST:
+        records = MenuListItem.objects.only(
+            "id",
+            "menu_list_id",
+            "name",
+            "image",
+            "thumbnail",
+            "variants",
+            "processing_status",
+            "image_width",
+            "image_height",
+            "url",
+            "order",
+            "updated_on",
+        )
+        return (
+            MenuList.objects.only("id", "name", "slug", "updated_on")
+            .annotate(meta_json=Cast("meta", TextField()))
+            .prefetch_related(Prefetch("MenuListItems", queryset=records.order_by("order", "id")))
+        )
+
+    images = ProductImage.objects.only(
+        "id",
+        "product_id",
+        "image",
+        "thumbnail",
+        "variants",
+        "processing_status",
+        "image_width",
+        "image_height",
+        "order",
+        "caption",
+        "updated_on",
+    )
+    return (
+        Product.objects.only("id", "name", "slug", "blurb", "updated_on")
+        .annotate(meta_json=Cast("meta", TextField()))
+        .prefetch_related(Prefetch("images", queryset=images.order_by("order", "id")))
+    )
+
+
+def get_catalog_instance(slug, for_read=False):
+    """
+    Load the MenuList or Product for a requested slug, or ``None`` when nothing matches.
+
+    With ``for_read`` the instance comes from ``read_queryset`` and costs a fixed three
+    queries including the slug lookup; otherwise it is a full row ready for updating.
+    """
+    match = resolve_slug(slug)
+    if match is None:
+        return None
+    kind, pk = match
+    queryset = read_queryset(kind) if for_read else CATALOG_MODELS[kind].objects.all()
+    return queryset.get(pk=pk)
+
+
+def catalog_validators(instance):
+    """
+    ``(etag, last_modified datetime)`` for an instance from ``read_queryset``, worked out from the
+    ``updated_on`` stamps of the record and its nested rows without serializing anything.
+    """
+    children = instance.MenuListItems.all() if isinstance(instance, MenuList) else instance.images.all()
+    stamps = [(child.pk, child.updated_on.isoformat()) for child in children]
+    etag = make_etag(instance._meta.model_name, instance.pk, instance.updated_on.isoformat(), stamps)
+    last_modified = max([instance.updated_on] + [child.updated_on for child in children])
+    return etag, last_modified
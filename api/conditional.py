@@ -0,0 +1,41 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Part of every ETag; bump it whenever a serializer's output changes shape so clients holding
+# an old validator don't get a 304 for a body that would now look different.
+PAYLOAD_VERSION = 5
+
+
+def make_etag(*parts):
+    """
+    Strong ETag from the values that determine a response body, typically ids and ``updated_on`` stamps.
+    """
+    digest = hashlib.sha1(repr((PAYLOAD_VERSION,) + parts).encode())
+    return quote_etag(digest.hexdigest())
+
+
+def timestamp(dt):
+    """
+    ``updated_on`` as whole seconds since the epoch, the resolution of Last-Modified.
+    """
+    return timegm(dt.utctimetuple())
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    The 304 (or 412) answer to a conditional request whose validators still match, else ``None``.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
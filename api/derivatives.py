@@ -0,0 +1,171 @@
+import functools
+import logging
+import math
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import File
+from PIL import Image
+
+from .models import content_hash
+
+try:
+    import pillow_avif  # noqa: F401 - registers an AVIF encoder with Pillow versions that lack one
+except ImportError:  # pragma: no cover - optional
+    pass
+
+logger = logging.getLogger("watchtower")
+
+# Pillow format, file extension and encoder options of each format a derivative may be made in.
+FORMATS = {
+    "avif": ("AVIF", ".avif", {"quality": 60}),
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+
+def spec(widths):
+    """
+    The derivatives an image should have, as ``(format, width)`` pairs: each of ``widths``, which
+    the image's model gives by ``variant_widths()``, in each format of API_IMAGE_DERIVATIVE_FORMATS
+    that Pillow can write here.
+    """
+    formats = writable(tuple(settings.API_IMAGE_DERIVATIVE_FORMATS))
+    return [(name, width) for name in formats for width in sorted(widths)]
+
+
+@functools.cache
+def writable(formats):
+    """
+    The ones among ``formats`` that Pillow can write here. The rest are skipped, with a warning
+    logged once per process.
+    """
+    Image.init()
+    supported = tuple(name for name in formats if FORMATS[name][0] in Image.SAVE)
+    if skipped := [name for name in formats if name not in supported]:
+        logger.warning(f"Pillow can't write {', '.join(skipped)} here, so no such derivatives are made")
+    return supported
+
+
+def missing(variants, source_width, widths):
+    """
+    The ``(format, width)`` pairs of the spec that the ``variants`` map lacks. Widths that aren't
+    smaller than the source are left out; the original serves those.
+    """
+    return [
+        (name, width)
+        for name, width in spec(widths)
+        if width < source_width and str(width) not in variants.get(name, {})
+    ]
+
+
+def current(variants, source_width, widths):
+    """
+    The entries of ``variants`` that are still in the spec for ``widths``, dropping formats and
+    widths that have since been taken out of it.
+    """
+    wanted = {(name, str(width)) for name, width in spec(widths) if width < source_width}
+    kept = {
+        name: {width: file for width, file in sizes.items() if (name, width) in wanted}
+        for name, sizes in variants.items()
+    }
+    return {name: sizes for name, sizes in kept.items() if sizes}
+
+
+def names(variants):
+    return [name for widths in variants.values() for name in widths.values()]
+
+
+def variant_name(image_name, format_name, width):
+    # The source's extension stays in, so bench.jpg and bench.png don't share bench-480w.webp.
+    return f"{image_name}-{width}w{FORMATS[format_name][1]}"
+
+
+def store(storage, name, content):
+    """
+    Save a generated file under ``name``, or under its content hash with API_CONTENT_HASH_NAMES,
+    and return ``(stored name, whether it replaced a file)``.
+    """
+    if settings.API_CONTENT_HASH_NAMES:
+        name = content_hash(content) + os.path.splitext(name)[1]
+        if not storage.exists(name):
+            storage.save(name, content)
+        return name, False
+    replaced = storage.exists(name)
+    return storage.save(name, content), replaced
+
+
+def reduce_decode(img, widths, box):
+    """
+    Have ``img``, opened but not yet loaded, decode at the smallest size that is still as wide as
+    each of ``widths`` and fills ``box``, the thumbnail's bounds, if there is one to make. JPEGs are
+    scaled by 1/2, 1/4 or 1/8 as they decode, which takes a fraction of the time and memory of
+    decoding a 6000px original in full; other formats decode in full and are shrunk with
+    ``reduce()`` as they are resized.
+    Raises ``ValueError`` if the image would still decode to more than API_IMAGE_MAX_PIXELS.
+    """
+    scales = [width / img.width for width in widths]
+    if box is not None:
+        scales.append(min(box[0] / img.width, box[1] / img.height))
+    scale = max(scales, default=1)
+    if scale < 1:
+        img.draft(None, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    if img.width * img.height > settings.API_IMAGE_MAX_PIXELS:
+        raise ValueError(f"{img.width}x{img.height} is more than API_IMAGE_MAX_PIXELS to decode")
+
+
+def pixel_bytes(img):
+    """
+    The size of the pixel buffer ``img`` decodes to: Pillow keeps a byte per pixel for 1-band
+    8-bit modes, two for 16-bit ones, and four for everything else, RGB included.
+    """
+    if img.mode in ("1", "L", "P"):
+        size = 1
+    elif img.mode.startswith("I;16"):
+        size = 2
+    else:
+        size = 4
+    return img.width * img.height * size
+
+
+def render(img, todo):
+    """
+    Encode the ``(format, width)`` pairs of ``todo`` from ``img``, yielding ``(format, width, file)``
+    with each file a spooled temporary file that is closed once the next is made. Widths are made
+    widest first, each scaled down from the previous one, and only one of them is held at a time.
+    """
+    current = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA" if "transparency" in img.info else "RGB")
+    for width in sorted({width for _, width in todo}, reverse=True):
+        size = (width, max(1, round(current.height * width / current.width)))
+        current = current.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for format_name in [name for name, w in todo if w == width]:
+            pil_format, _, options = FORMATS[format_name]
+            with tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE) as encoded:
+                (current.convert("RGB") if pil_format == "JPEG" else current).save(encoded, pil_format, **options)
+                yield format_name, width, encoded
+
+
+def store_variants(image_file, variants, rendered):
+    """
+    Store the ``(format, width, file)`` triples of ``rendered`` as variants of ``image_file``, under
+    names that depend only on the image, so storing them again stores the same files. Returns the
+    completed ``variants`` map, ``{format: {width: name}}``, and the names that replaced stored files.
+    """
+    variants = {name: dict(sizes) for name, sizes in variants.items()}
+    replaced = []
+    for format_name, width, encoded in rendered:
+        name = variant_name(image_file.name, format_name, width)
+        name, overwrote = store(image_file.storage, name, File(encoded, name))
+        variants.setdefault(format_name, {})[str(width)] = name
+        if overwrote:
+            replaced.append(name)
+    return variants, replaced
+
+
+def make_variants(image_file, img, variants, todo):
+    """
+    Encode and store the ``(format, width)`` pairs of ``todo``, as ``missing()`` gives them, from
+    ``img``, the open PIL image of ``image_file``. Returns what ``store_variants`` does.
+    """
+    return store_variants(image_file, variants, render(img, todo))
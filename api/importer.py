@@ -0,0 +1,139 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .catalog import CATALOG_MODELS, MENU_LIST, PRODUCT
+from .models import MenuListItem, ProductImage, invalidate_replaced_files, slugify_name
+from .payloads import schedule_publish
+from .processing import schedule_processing
+from .serializers import ImportMenuListSerializer, ImportProductSerializer
+
+IMPORT_SERIALIZERS = {PRODUCT: ImportProductSerializer, MENU_LIST: ImportMenuListSerializer}
+
+
+class ImportFailed(Exception):
+    """
+    Raised before anything is written; ``errors`` lists ``{"line", "errors"}`` for each rejected line.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} lines were rejected")
+        self.errors = errors
+
+
+def read_items(lines):
+    """
+    Decode NDJSON ``lines``, str or bytes, into ``(line number, item)`` pairs, skipping blank lines.
+    Returns the pairs and the errors of lines that are not JSON objects.
+    """
+    items, errors = [], []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as error:
+            errors.append({"line": number, "errors": f"not valid JSON: {error}"})
+            continue
+        if not isinstance(item, dict):
+            errors.append({"line": number, "errors": "each line must be a JSON object"})
+            continue
+        items.append((number, item))
+    return items, errors
+
+
+def validate_items(items):
+    """
+    Validate every item before anything is written: its fields, that its kind is ``product`` or
+    ``menulist`` and that its slug is used neither by another item nor by an existing record.
+    Returns ``(kind, validated data)`` pairs and a list of errors by line number.
+    """
+    validated, errors, lines_by_slug = [], [], {}
+    for number, item in items:
+        serializer_class = IMPORT_SERIALIZERS.get(item.get("kind"))
+        if serializer_class is None:
+            errors.append({"line": number, "errors": {"kind": f"must be one of {sorted(IMPORT_SERIALIZERS)}"}})
+            continue
+        serializer = serializer_class(data=item)
+        if not serializer.is_valid():
+            errors.append({"line": number, "errors": serializer.errors})
+            continue
+
+        kind, slug = item["kind"], slugify_name(serializer.validated_data["name"])
+        if (kind, slug) in lines_by_slug:
+            message = f"the slug {slug} is already used on line {lines_by_slug[kind, slug]}"
+            errors.append({"line": number, "errors": {"name": message}})
+            continue
+        lines_by_slug[kind, slug] = number
+        validated.append((kind, serializer.validated_data))
+
+    # One query per kind for the slugs that are already taken.
+    for kind, model in CATALOG_MODELS.items():
+        slugs = [slug for item_kind, slug in lines_by_slug if item_kind == kind]
+        for slug in model.objects.filter(slug__in=slugs).values_list("slug", flat=True):
+            message = f"the slug {slug} is already in use"
+            errors.append({"line": lines_by_slug[kind, slug], "errors": {"name": message}})
+
+    return validated, sorted(errors, key=lambda error: error["line"])
+
+
+def import_catalog(lines, open_file=None):
+    """
+    Create the products and menu lists described by NDJSON ``lines``, one object per line:
+
+        {"kind": "product", "name": ..., "blurb": ..., "meta": ..., "images": [{"image", "order", "caption"}]}
+        {"kind": "menulist", "name": ..., "meta": ..., "records": [{"name", "image", "url", "order"}]}
+
+    ``open_file(name)`` returns the file to upload for an image name, or ``None`` when the name
+    refers to a file that is already in storage.
+
+    Everything is validated first; if any line is invalid ImportFailed is raised and nothing is
+    written. Otherwise all rows go in with bulk inserts in one transaction. Product images are
+    written as pending and their thumbnails are made by the ``process_images`` workers.
+    """
+    items, errors = read_items(lines)
+    if len(items) > settings.API_IMPORT_MAX_ITEMS:
+        raise ImportFailed([{"line": None, "errors": f"at most {settings.API_IMPORT_MAX_ITEMS} items per import"}])
+    validated, invalid = validate_items(items)
+    errors = sorted(errors + invalid, key=lambda error: error["line"])
+    if errors:
+        raise ImportFailed(errors)
+
+    open_file = open_file or (lambda name: None)
+    parents = {kind: [] for kind in CATALOG_MODELS}
+    children = {kind: [] for kind in CATALOG_MODELS}
+    for kind, data in validated:
+        data = dict(data)
+        nested = data.pop("images" if kind == PRODUCT else "records", [])
+        parent = CATALOG_MODELS[kind](slug=slugify_name(data["name"]), **data)
+        parents[kind].append(parent)
+        for child in nested:
+            children[kind].append((parent, {**child, "image": open_file(child["image"]) or child["image"]}))
+
+    with transaction.atomic():
+        for kind, model in CATALOG_MODELS.items():
+            model.objects.bulk_create(parents[kind])
+        images = [ProductImage(product=product, **image) for product, image in children[PRODUCT]]
+        records = [MenuListItem(menu_list=menu_list, **record) for menu_list, record in children[MENU_LIST]]
+        for child in [*images, *records]:
+            if not child.image._committed:
+                child.read_image_metadata()
+        # Uploads may replace files the CDN already serves under the same name.
+        invalidate_replaced_files([*images, *records])
+        # bulk_create stores uploaded files, as save() would.
+        ProductImage.objects.bulk_create(images)
+        MenuListItem.objects.bulk_create(records)
+        # bulk_create sends no signals.
+        for kind, created in parents.items():
+            for instance in created:
+                schedule_publish(kind, instance.pk)
+        for image in [*images, *records]:
+            schedule_processing(image)
+
+    return {
+        "products": len(parents[PRODUCT]),
+        "menu_lists": len(parents[MENU_LIST]),
+        "images": len(images),
+        "records": len(records),
+    }
@@ -0,0 +1,83 @@
+import hashlib
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_versions, get_version
+from .conditional import timestamp
+from .models import LandingPageImage
+from .serializers import LandingPageImageSerializer
+
+POOL_KEY = "api:landing-page-image-ids"
+IMAGE_KEY_PREFIX = "api:landing-page-image:"
+IMAGE_VERSION_KEY_PREFIX = "api:landing-page-image-version:"
+
+
+def get_pool():
+    """
+    The pk of every LandingPageImage, in pk order. Cached until an image is added or deleted, so
+    picking one never touches the database.
+    """
+    pool = cache.get(POOL_KEY)
+    if pool is None:
+        pool = list(LandingPageImage.objects.order_by("pk").values_list("pk", flat=True))
+        cache.set(POOL_KEY, pool, timeout=settings.API_CACHE_TIMEOUT)
+    return pool
+
+
+def get_image(pk):
+    """
+    One picked LandingPageImage as ``{"pk", "updated_on", "body"}``, or ``None`` if it is gone.
+    Each image is cached on its own, under a version that ``invalidate_images`` moves on when the
+    image changes, so a change costs one image its entry rather than the whole pool.
+    """
+    key = f"{IMAGE_KEY_PREFIX}{pk}:{get_version(IMAGE_VERSION_KEY_PREFIX + str(pk))}"
+    entry = cache.get(key)
+    if entry is None:
+        image = (
+            LandingPageImage.objects.filter(pk=pk)
+            .only(
+                "pk",
+                "image",
+                "thumbnail",
+                "variants",
+                "processing_status",
+                "image_width",
+                "image_height",
+                "updated_on",
+            )
+            .first()
+        )
+        if image is None:
+            return None
+        entry = {"pk": pk, "updated_on": timestamp(image.updated_on), "body": LandingPageImageSerializer(image).data}
+        cache.set(key, entry, timeout=settings.API_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_pool():
+    cache.delete(POOL_KEY)
+
+
+def invalidate_images(pks):
+    bump_versions([IMAGE_VERSION_KEY_PREFIX + str(pk) for pk in pks])
+
+
+def pick_random(pool):
+    """
+    A uniformly random pk from the pool, or ``None`` when it is empty.
+    """
+    return random.choice(pool) if pool else None
+
+
+def pick_for_hour(pool, now):
+    """
+    The same pk for everyone during an hour, so responses can be shared by a CDN; the hour
+    is hashed so consecutive hours don't just step through the pool in order.
+    """
+    if not pool:
+        return None
+    hour = int(now.timestamp() // 3600)
+    index = int(hashlib.sha1(str(hour).encode()).hexdigest(), 16) % len(pool)
+    return pool[index]
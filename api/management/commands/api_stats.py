@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api import stats
+from api.cache import CACHE_HITS, CACHE_MISSES
+from api.models import IMAGES_PROCESSED, IMAGES_UNCHANGED
+
+COUNTERS = [CACHE_HITS, CACHE_MISSES, IMAGES_PROCESSED, IMAGES_UNCHANGED]
+
+
+class Command(BaseCommand):
+    help = "Print the api cache hit / miss and image processing counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="zero the counters after printing them")
+
+    def handle(self, *args, **options):
+        values = stats.snapshot(COUNTERS)
+        for name, value in values.items():
+            self.stdout.write(f"{name}: {value}")
+
+        lookups = values[CACHE_HITS] + values[CACHE_MISSES]
+        if lookups:
+            self.stdout.write(f"catalog_cache_hit_rate: {values[CACHE_HITS] / lookups:.1%}")
+
+        uploads = values[IMAGES_PROCESSED] + values[IMAGES_UNCHANGED]
+        if uploads:
+            self.stdout.write(f"image_processing_skipped_rate: {values[IMAGES_UNCHANGED] / uploads:.1%}")
+
+        if options["reset"]:
+            stats.reset(COUNTERS)
+            self.stdout.write(self.style.SUCCESS("counters reset"))
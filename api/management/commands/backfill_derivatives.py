@@ -0,0 +1,182 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import cdn, derivatives
+from api.models import THUMBNAIL_SIZE
+from api.processing import PROCESSED_MODELS, image_processed
+
+
+def render(model_name, pk, image_name, variants, thumbnail):
+    """
+    Decode and encode, in a worker process, what one image row lacks of the current spec: its
+    variants and, with ``thumbnail``, a new thumbnail. Returns the variants to keep, the encoded
+    ``(format, width, bytes)`` of the new ones and the ``(name, bytes)`` of the thumbnail, if any.
+    """
+    instance = PROCESSED_MODELS[model_name](pk=pk, image=image_name)
+    widths = instance.variant_widths()
+    with instance.open_image() as img:
+        kept = derivatives.current(variants, img.width, widths)
+        todo = derivatives.missing(kept, img.width, widths)
+        derivatives.reduce_decode(img, [width for _, width in todo], THUMBNAIL_SIZE if thumbnail else None)
+        files = []
+        for format_name, width, encoded in derivatives.render(img, todo):
+            encoded.seek(0)
+            files.append((format_name, width, encoded.read()))
+        if thumbnail:
+            name, content = instance.make_thumbnail(img)
+            with content:
+                content.seek(0)
+                thumbnail = (name, content.read())
+    return kept, files, thumbnail or None
+
+
+class Command(BaseCommand):
+    help = (
+        "Remake the variants and thumbnails of stored images to match the current spec, decoding in a pool "
+        "of processes and uploading with a pool of threads. Progress is checkpointed, so a stopped run resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count(), help="images decoded at once")
+        parser.add_argument(
+            "--upload-workers", type=int, default=settings.API_IMAGE_WORKERS, help="images uploaded at once"
+        )
+        parser.add_argument("--batch-size", type=int, default=100, help="rows written per transaction")
+        parser.add_argument("--max-rate", type=float, help="most images remade per second")
+        parser.add_argument("--thumbnails", action="store_true", help="remake every thumbnail, not only missing ones")
+        parser.add_argument("--models", nargs="+", choices=list(PROCESSED_MODELS), default=list(PROCESSED_MODELS))
+        parser.add_argument(
+            "--checkpoint", default="derivatives-backfill.json", help="file recording the last row done of each model"
+        )
+        parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.checkpoint = {} if options["restart"] else self.read_checkpoint()
+        self.started, self.made, self.failed, self.uploaded = time.monotonic(), 0, 0, 0
+
+        # Workers never touch the database; they are all forked up front, before any cursor is open.
+        context = multiprocessing.get_context("fork")
+        with (
+            ProcessPoolExecutor(max_workers=options["processes"], mp_context=context) as processes,
+            ThreadPoolExecutor(max_workers=options["upload_workers"]) as uploads,
+        ):
+            processes.submit(int).result()
+            for model_name in options["models"]:
+                self.backfill(PROCESSED_MODELS[model_name], processes, uploads)
+
+        if os.path.exists(options["checkpoint"]):
+            os.remove(options["checkpoint"])
+        self.stdout.write(self.style.SUCCESS(f"Remade the derivatives of {self.made} images, {self.failed} failed"))
+
+    def backfill(self, model, processes, uploads):
+        model_name = model._meta.model_name
+        rows = model.objects.filter(processing_status=model.READY, pk__gt=self.checkpoint.get(model_name, 0))
+        rows = rows.exclude(image="").order_by("pk")
+        total, seen = rows.count(), 0
+        rows = rows.iterator(chunk_size=self.options["batch_size"])
+        while batch := list(islice(rows, self.options["batch_size"])):
+            seen += len(batch)
+            jobs = {}
+            for instance in batch:
+                thumbnail = self.options["thumbnails"] or not instance.thumbnail
+                if self.up_to_date(instance, thumbnail):
+                    continue
+                job = processes.submit(
+                    render, model_name, instance.pk, instance.image.name, instance.variants, thumbnail
+                )
+                jobs[job] = instance
+
+            # Each image is uploaded as soon as it is encoded, while the rest are still being made.
+            thumbnails = {instance.pk: instance.thumbnail.name for instance in jobs.values()}
+            stored = {uploads.submit(self.upload, jobs[job], job): jobs[job] for job in as_completed(jobs)}
+            results = {instance: upload.result() for upload, instance in stored.items()}
+            replaced = []
+            with transaction.atomic():
+                for instance, result in results.items():
+                    if result is None:
+                        self.failed += 1
+                        continue
+                    variants, thumbnail, names, size = result
+                    if variants != instance.variants or thumbnail != thumbnails[instance.pk]:
+                        self.write(model, instance, variants, thumbnail)
+                    replaced.extend(names)
+                    self.uploaded += size
+            cdn.invalidate(*replaced)
+
+            self.checkpoint[model_name] = batch[-1].pk
+            self.write_checkpoint()
+            self.throttle()
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(
+                f"{model_name}: {seen}/{total} rows, {self.made} remade, {self.failed} failed, "
+                f"{self.made / elapsed:.1f} images/s, {self.uploaded / 2**20 / elapsed:.1f} MB/s uploaded"
+            )
+
+    def up_to_date(self, instance, thumbnail):
+        # Rows without a stored width are sent to a worker, which reads it from the file.
+        if thumbnail or instance.image_width is None:
+            return False
+        widths = instance.variant_widths()
+        kept = derivatives.current(instance.variants, instance.image_width, widths)
+        return kept == instance.variants and not derivatives.missing(kept, instance.image_width, widths)
+
+    def upload(self, instance, job):
+        """
+        Store what a worker made for ``instance``, in an upload thread, which leaves the database
+        alone. Returns ``(variants, thumbnail name, overwritten names, bytes stored)``, or
+        ``None`` if the worker or the upload failed.
+        """
+        try:
+            kept, files, thumbnail = job.result()
+            rendered = [(format_name, width, ContentFile(data)) for format_name, width, data in files]
+            variants, replaced = derivatives.store_variants(instance.image, kept, rendered)
+            size = sum(len(data) for _, _, data in files)
+            if thumbnail is not None:
+                name, data = thumbnail
+                replaced.extend(instance.store_thumbnail(name, ContentFile(data)))
+                size += len(data)
+        except Exception as e:
+            self.stderr.write(f"Could not remake the derivatives of {instance._meta.model_name} {instance.pk}: {e}")
+            return None
+        return variants, instance.thumbnail.name, replaced, size
+
+    def write(self, model, instance, variants, thumbnail):
+        # Rows whose image was replaced while their derivatives were being made are left to process_image.
+        done = model.objects.filter(pk=instance.pk, image=instance.image.name, processing_status=model.READY).update(
+            variants=variants, thumbnail=thumbnail, updated_on=timezone.now()
+        )
+        if done:
+            self.made += 1
+            instance.variants = variants
+            image_processed.send(sender=model, instance=instance)
+
+    def throttle(self):
+        if self.options["max_rate"]:
+            time.sleep(max(0, self.made / self.options["max_rate"] - (time.monotonic() - self.started)))
+
+    def read_checkpoint(self):
+        try:
+            with open(self.options["checkpoint"]) as file:
+                checkpoint = json.load(file)
+        except FileNotFoundError:
+            return {}
+        self.stdout.write(f"Resuming after {checkpoint}")
+        return checkpoint
+
+    def write_checkpoint(self):
+        # Written to a temporary file first, so a run stopped mid-write leaves the last checkpoint.
+        temporary = f"{self.options['checkpoint']}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(self.checkpoint, file)
+        os.replace(temporary, self.options["checkpoint"])
@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.catalog import MENU_LIST, PRODUCT
+from api.landing import invalidate_images
+from api.models import LandingPageImage, MenuListItem, ProductImage, image_metadata
+from api.payloads import schedule_publish
+
+# Each model, and the payload kind and column of the parent that serves its width and height.
+MODELS = [
+    (ProductImage, PRODUCT, "product_id"),
+    (MenuListItem, MENU_LIST, "menu_list_id"),
+    (LandingPageImage, None, None),
+]
+
+
+class Command(BaseCommand):
+    help = "Store the size, dimensions, format and hash of images saved before those columns existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.API_IMAGE_WORKERS, help="files read at once")
+        parser.add_argument("--batch-size", type=int, default=200, help="rows written per transaction")
+
+    def handle(self, *args, **options):
+        started, done = time.monotonic(), 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for model, kind, parent_field in MODELS:
+                storage = model._meta.get_field("image").storage
+                rows = (
+                    model.objects.filter(Q(image_bytes__isnull=True) | Q(image_sha256=""))
+                    .exclude(image="")
+                    .values_list("pk", "image", parent_field or "pk")
+                    .iterator()
+                )
+                while batch := list(islice(rows, options["batch_size"])):
+                    results = list(pool.map(lambda row: self.read(storage, row[1]), batch))
+                    # Rows are only written if their image is still the one that was read. Their
+                    # updated_on is stamped too, as the ETag and Last-Modified are worked out from it.
+                    with transaction.atomic():
+                        written = []
+                        for (pk, name, parent_pk), metadata in zip(batch, results):
+                            if not metadata:
+                                continue
+                            if model.objects.filter(pk=pk, image=name).update(**metadata, updated_on=timezone.now()):
+                                done += 1
+                                written.append(pk)
+                                if kind is not None:
+                                    schedule_publish(kind, parent_pk)
+                        if kind is None:
+                            transaction.on_commit(partial(invalidate_images, written))
+                    rate = done / (time.monotonic() - started)
+                    self.stdout.write(f"{model._meta.model_name}: {done} rows stored, {rate:.1f}/s")
+        self.stdout.write(self.style.SUCCESS(f"Stored the metadata of {done} images"))
+
+    def read(self, storage, name):
+        try:
+            with storage.open(name, "rb") as file:
+                return image_metadata(file)
+        except OSError as e:
+            self.stderr.write(f"Could not read {name}: {e}")
+            return None
@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from api import derivatives
+from api.models import THUMBNAIL_SIZE
+
+
+def synthetic_jpeg(path, size):
+    # Gradients under noise, so it encodes to about the size of a photo rather than a flat color.
+    bands = [Image.linear_gradient("L").resize(size), Image.radial_gradient("L").resize(size)]
+    Image.merge("RGB", [*bands, Image.effect_noise(size, 48)]).save(path, "JPEG", quality=90)
+
+
+def process(path, todo, reduced):
+    """
+    Make the variants in ``todo`` and a thumbnail of the image at ``path`` as ``process_image`` does,
+    decoding it in full or, with ``reduced``, through ``reduce_decode``. Returns the seconds taken,
+    the size decoded, and how far it raised the process's peak RSS, in kilobytes on Linux.
+    """
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with Image.open(path) as img:
+        if reduced:
+            derivatives.reduce_decode(img, [width for _, width in todo], THUMBNAIL_SIZE)
+        img.load()
+        decoded = img.size
+        for _ in derivatives.render(img, todo):
+            pass
+        img.thumbnail(THUMBNAIL_SIZE)
+        img.save(BytesIO(), img.format, quality=85)
+    return time.perf_counter() - started, decoded, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+
+class Command(BaseCommand):
+    help = "Compare full and reduced decoding when processing a corpus of images, for time and peak memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="images, or directories of them; synthetic JPEGs if none")
+        parser.add_argument("--synthetic", type=int, default=3, help="synthetic JPEGs made when no paths are given")
+        parser.add_argument("--size", default="6000x4000", help="size of the synthetic JPEGs")
+        parser.add_argument(
+            "--widths", type=int, nargs="+", default=settings.API_IMAGE_DERIVATIVE_WIDTHS, help="variant widths"
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = self.corpus(options["paths"])
+            if not paths:
+                size = tuple(int(side) for side in options["size"].split("x"))
+                paths = [os.path.join(directory, f"synthetic-{i}.jpg") for i in range(options["synthetic"])]
+                for path in paths:
+                    synthetic_jpeg(path, size)
+            self.run(paths, options["widths"])
+
+    def corpus(self, paths):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)))
+            else:
+                files.append(path)
+        return files
+
+    def run(self, paths, widths):
+        # Each job runs in a fresh process of its own, so one's peak RSS doesn't hide the next's.
+        context = multiprocessing.get_context("fork")
+        totals = {False: [0, 0], True: [0, 0]}
+        self.stdout.write(f"{len(paths)} images, variants {widths} in {[name for name, _ in derivatives.spec([0])]}")
+        for path in paths:
+            try:
+                with Image.open(path) as img:
+                    size = img.size
+            except OSError:
+                continue
+            todo = derivatives.missing({}, size[0], widths)
+            results = {}
+            for reduced in (False, True):
+                with context.Pool(1) as pool:
+                    seconds, decoded, peak = pool.apply(process, (path, todo, reduced))
+                totals[reduced][0] += seconds
+                totals[reduced][1] = max(totals[reduced][1], peak)
+                results[reduced] = f"{seconds:.2f}s, decoded {decoded[0]}x{decoded[1]}, peak +{peak / 1024:.0f} MB"
+            self.stdout.write(
+                f"{os.path.basename(path)} {size[0]}x{size[1]}: full {results[False]}; reduced {results[True]}"
+            )
+        (full_time, full_peak), (reduced_time, reduced_peak) = totals[False], totals[True]
+        if reduced_time:
+            self.stdout.write(
+                f"Total: full {full_time:.2f}s, largest peak +{full_peak / 1024:.0f} MB; reduced {reduced_time:.2f}s, "
+                f"largest peak +{reduced_peak / 1024:.0f} MB; {full_time / reduced_time:.1f}x faster"
+            )
@@ -0,0 +1,83 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import PreEncoded, get_json_renderer
+
+META = {"designer": "BDDW", "materials": ["oak", "walnut", "bronze"], "lead_time": "12-14 weeks", "notes": "’" * 40}
+
+
+def menu_list_body(records):
+    return {
+        "id": 1,
+        "name": "Tables",
+        "meta": META,
+        "records": [
+            {
+                "id": i,
+                "name": f"Sev-Drulo Dining Table {i}",
+                "image": f"tables/sev-drulo-dining-table-{i}.jpg",
+                "url": f"/product/sev-drulo-dining-table-{i}",
+                "order": i,
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def product_body(images):
+    return {
+        "id": 2,
+        "name": "Sev-Drulo Dining Table",
+        "blurb": "Solid oak top on a forged bronze base, made to order in Philadelphia. " * 4,
+        "meta": META,
+        "images": [
+            {
+                "id": i,
+                "image": f"products/sev-drulo-dining-table-{i}.jpg",
+                "thumbnail": f"products/sev-drulo-dining-table-{i}-thumb.jpg",
+                "order": i,
+                "caption": f"Detail {i} of the bronze base",
+            }
+            for i in range(images)
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's JSONRenderer with the API_JSON_RENDERER on synthetic menu list and product bodies"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--records", type=int, default=60, help="records in the menu list")
+        parser.add_argument("--images", type=int, default=30, help="images in the product")
+        parser.add_argument("--number", type=int, default=2000, help="renders per timing")
+
+    def handle(self, *args, **options):
+        drf, fast = JSONRenderer(), get_json_renderer()
+        menu_list, product = menu_list_body(options["records"]), product_body(options["images"])
+        stored = {slug: drf.render(body) for slug, body in [("tables", menu_list), ("sev-drulo", product)]}
+
+        cases = [
+            ("menu list", menu_list, menu_list),
+            ("product", product, product),
+            # A batch response: decoded bodies for DRF, the stored bytes for the fast renderer.
+            (
+                "batch of 2",
+                {"body": {slug: json.loads(content) for slug, content in stored.items()}},
+                {"body": {slug: PreEncoded(content) for slug, content in stored.items()}},
+            ),
+        ]
+        self.stdout.write(f"{type(fast).__name__} against JSONRenderer, {options['number']} renders each")
+        for label, data, fast_data in cases:
+            if json.loads(drf.render(data)) != json.loads(fast.render(fast_data)):
+                self.stderr.write(self.style.ERROR(f"{label}: outputs differ"))
+                continue
+            drf_time = timeit.timeit(lambda: drf.render(data), number=options["number"])
+            fast_time = timeit.timeit(lambda: fast.render(fast_data), number=options["number"])
+            per_render = 1e6 / options["number"]
+            self.stdout.write(
+                f"{label} ({len(drf.render(data))} bytes): JSONRenderer {drf_time * per_render:.1f}us, "
+                f"{type(fast).__name__} {fast_time * per_render:.1f}us, {drf_time / fast_time:.1f}x"
+            )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.payloads import find_inconsistencies, publish
+
+
+class Command(BaseCommand):
+    help = "Compare the stored api_response payloads with what the serializers produce now"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="republish every inconsistent payload")
+
+    def handle(self, *args, **options):
+        problems = list(find_inconsistencies())
+        for kind, pk, problem in problems:
+            self.stdout.write(f"{kind} {pk}: {problem}")
+            if options["fix"]:
+                publish(kind, pk)
+
+        if not problems:
+            self.stdout.write(self.style.SUCCESS("All payloads are consistent"))
+        elif options["fix"]:
+            self.stdout.write(self.style.SUCCESS(f"Republished {len(problems)} payloads"))
+        else:
+            raise CommandError(f"{len(problems)} payloads are inconsistent, run with --fix to republish them")
@@ -0,0 +1,42 @@
+import json
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import ImportFailed, import_catalog
+
+
+class Command(BaseCommand):
+    help = "Create the products and menu lists in an NDJSON file, one object per line, in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="the NDJSON file to import")
+        parser.add_argument(
+            "--images-dir", help="upload image names found under this directory; other names must already be stored"
+        )
+
+    def handle(self, *args, **options):
+        images_dir = options["images_dir"]
+        opened = []
+
+        def open_file(name):
+            path = os.path.join(images_dir, name)
+            if not os.path.isfile(path):
+                return None
+            handle = open(path, "rb")
+            opened.append(handle)
+            return File(handle, name=os.path.basename(name))
+
+        try:
+            with open(options["path"], "rb") as lines:
+                summary = import_catalog(lines, open_file if images_dir else None)
+        except ImportFailed as error:
+            for line_error in error.errors:
+                self.stderr.write(json.dumps(line_error))
+            raise CommandError(f"{error}, nothing was imported")
+        finally:
+            for handle in opened:
+                handle.close()
+
+        self.stdout.write(self.style.SUCCESS(", ".join(f"{count} {name}" for name, count in summary.items())))
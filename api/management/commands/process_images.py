@@ -0,0 +1,47 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.processing import pop, process_image, requeue
+
+
+class Command(BaseCommand):
+    help = "Make thumbnails for the images queued in Redis, with a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.API_IMAGE_WORKERS, help="images processed at once")
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="first queue every pending or failed image, and those in processing for API_IMAGE_PROCESSING_TIMEOUT",
+        )
+        parser.add_argument("--once", action="store_true", help="stop once the queue is empty")
+
+    def handle(self, *args, **options):
+        if options["requeue"]:
+            self.stdout.write(f"Queued {requeue()} images")
+
+        # Take a job off the queue only when a worker is free to start it.
+        free = threading.BoundedSemaphore(options["workers"])
+
+        def work(model_name, pk):
+            try:
+                if process_image(model_name, pk):
+                    self.stdout.write(f"{model_name} {pk}: ready")
+            finally:
+                close_old_connections()
+                free.release()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while True:
+                free.acquire()
+                item = pop(timeout=5)
+                if item is None:
+                    free.release()
+                    if options["once"]:
+                        break
+                    continue
+                pool.submit(work, *item)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.payloads import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Republish the stored api_response payload of every MenuList and Product"
+
+    def handle(self, *args, **options):
+        written = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Published {written} payloads"))
@@ -0,0 +1,102 @@
+import os
+from functools import partial
+
+from django.core.files.base import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.catalog import MENU_LIST, PRODUCT
+from api.landing import invalidate_images
+from api.models import CONTENT_HASH_NAME, LandingPageImage, MenuListItem, ProductImage, content_hash, published_names
+from api.payloads import schedule_publish
+
+# Each model's file fields, and the payload kind and column of the parent that serves them.
+RENAMED = [
+    (ProductImage, ["image", "thumbnail"], PRODUCT, "product_id"),
+    (MenuListItem, ["image", "thumbnail"], MENU_LIST, "menu_list_id"),
+    (LandingPageImage, ["image", "thumbnail"], None, None),
+]
+
+
+class Command(BaseCommand):
+    help = "Move stored images, thumbnails and variants to names made from the hash of their content"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="list the new names without copying or saving")
+        parser.add_argument("--delete-old", action="store_true", help="delete the old files once nothing uses them")
+
+    def handle(self, *args, **options):
+        # Old name -> new name, shared by every row and field that stores the same file.
+        renamed = {}
+
+        def rename(model, field, name):
+            if name not in renamed:
+                try:
+                    renamed[name] = self.copy(model, field, name, options["dry_run"])
+                except OSError as e:
+                    self.stderr.write(f"{model._meta.model_name}: could not read {name}: {e}")
+                    renamed[name] = None
+            return renamed[name] or name
+
+        updates = []
+        for model, fields, kind, parent_field in RENAMED:
+            for field_name in fields:
+                field = model._meta.get_field(field_name)
+                rows = model.objects.exclude(**{f"{field_name}__isnull": True}).exclude(**{field_name: ""})
+                for pk, name, parent_pk in rows.values_list("pk", field_name, parent_field or "pk").iterator():
+                    if not CONTENT_HASH_NAME.search(name) and rename(model, field, name) != name:
+                        updates.append((model, pk, field_name, renamed[name], kind, parent_pk))
+
+            if hasattr(model, "variants"):
+                field = model._meta.get_field("image")
+                rows = model.objects.exclude(variants={}).values_list("pk", "variants", parent_field or "pk")
+                for pk, variants, parent_pk in rows.iterator():
+                    new_variants = {
+                        format_name: {
+                            width: name if CONTENT_HASH_NAME.search(name) else rename(model, field, name)
+                            for width, name in widths.items()
+                        }
+                        for format_name, widths in variants.items()
+                    }
+                    if new_variants != variants:
+                        updates.append((model, pk, "variants", new_variants, kind, parent_pk))
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would rename {len(updates)} fields")
+            return
+
+        # One transaction, so each payload is republished once after every row points at the new names.
+        with transaction.atomic():
+            now = timezone.now()
+            for model, pk, field_name, value, kind, parent_pk in updates:
+                model.objects.filter(pk=pk).update(**{field_name: value, "updated_on": now})
+                if kind is not None:
+                    schedule_publish(kind, parent_pk)
+            landing = [pk for _, pk, _, _, kind, _ in updates if kind is None]
+            if landing:
+                transaction.on_commit(partial(invalidate_images, landing))
+        self.stdout.write(f"Renamed {len(updates)} fields")
+
+        if options["delete_old"]:
+            self.delete_unused([name for name, new_name in renamed.items() if new_name])
+
+    def copy(self, model, field, name, dry_run):
+        """
+        Store a copy of file ``name`` under its content hash, unless one is already there, and return the new name.
+        """
+        with field.storage.open(name, "rb") as handle:
+            content = File(handle, name)
+            new_name = field.generate_filename(model(), content_hash(content) + os.path.splitext(name)[1].lower())
+            self.stdout.write(f"{name} -> {new_name}")
+            if not dry_run and not field.storage.exists(new_name):
+                content.seek(0)
+                field.storage.save(new_name, content)
+        return new_name
+
+    def delete_unused(self, names):
+        unused = set(names) - published_names(names)
+        storage = ProductImage._meta.get_field("image").storage
+        for name in unused:
+            storage.delete(name)
+        self.stdout.write(f"Deleted {len(unused)} old files")
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_version, get_version
+from .conditional import make_etag, timestamp
+from .models import DropDownMenu
+from .renderers import render_json
+
+DEFAULT_MENU = "main"
+MENU_KEY_PREFIX = "api:drop-down-menu:"
+MENU_VERSION_KEY = "api:drop-down-menu-version"
+
+
+def get_menu_entry(name):
+    """
+    The ``api_drop_down_menu`` response for a named menu as pre-encoded JSON bytes with its
+    validators and ``version``, or ``None`` when there is no such menu. Cached until any menu is saved.
+    """
+    key = f"{MENU_KEY_PREFIX}{get_version(MENU_VERSION_KEY)}:{name}"
+    entry = cache.get(key)
+    if entry is None:
+        menu = DropDownMenu.objects.filter(name=name).first()
+        if menu is None:
+            return None
+        entry = {
+            "content": render_json({"body": menu.data}),
+            "etag": make_etag("dropdownmenu", menu.pk, menu.updated_on.isoformat()),
+            "last_modified": timestamp(menu.updated_on),
+            "version": menu.updated_on.strftime("%Y%m%d%H%M%S%f"),
+        }
+        cache.set(key, entry, timeout=settings.API_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_menus():
+    # A rename leaves the old name's key behind, so retire every menu key at once.
+    bump_version(MENU_VERSION_KEY)
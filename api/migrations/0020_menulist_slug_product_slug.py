@@ -0,0 +1,64 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+def slugify_name(name):
+    # Frozen copy of api.models.slugify_name so later changes to it don't alter this migration.
+    return name.lower().replace("'", "").replace("\u2019", "").replace(" ", "-")
+
+
+def backfill_slugs(apps, schema_editor):
+    for model_name in ["MenuList", "Product"]:
+        model = apps.get_model("api", model_name)
+        taken = set()
+        for obj in model.objects.order_by("pk").only("pk", "name"):
+            slug = slugify_name(obj.name)
+            if slug in taken:
+                # Duplicate names were never reachable through the api; keep them unique by pk.
+                slug = f"{slug}-{obj.pk}"
+            taken.add(slug)
+            model.objects.filter(pk=obj.pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_alter_menulistitem_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menulist",
+            name="slug",
+            field=models.SlugField(allow_unicode=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="slug",
+            field=models.SlugField(allow_unicode=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="menulist",
+            name="slug",
+            field=models.SlugField(
+                allow_unicode=True,
+                editable=False,
+                help_text="url slug, generated from the name",
+                max_length=255,
+                unique=True,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="slug",
+            field=models.SlugField(
+                allow_unicode=True,
+                editable=False,
+                help_text="url slug, generated from the name",
+                max_length=255,
+                unique=True,
+            ),
+        ),
+    ]
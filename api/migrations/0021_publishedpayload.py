@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0020_menulist_slug_product_slug"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublishedPayload",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(choices=[("menulist", "menu list"), ("product", "product")], max_length=16)),
+                ("object_id", models.BigIntegerField()),
+                ("slug", models.SlugField(allow_unicode=True, max_length=255)),
+                ("content", models.BinaryField()),
+                ("etag", models.CharField(max_length=64)),
+                ("last_modified", models.DateTimeField()),
+                ("version", models.PositiveIntegerField(help_text="payload format the content was rendered with")),
+                ("updated_on", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="publishedpayload",
+            constraint=models.UniqueConstraint(fields=("kind", "object_id"), name="unique_published_payload"),
+        ),
+    ]
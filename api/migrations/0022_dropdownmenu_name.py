@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+def name_menus(apps, schema_editor):
+    DropDownMenu = apps.get_model("api", "DropDownMenu")
+    # The api used to serve the first menu by pk, so that one becomes "main".
+    for index, pk in enumerate(DropDownMenu.objects.order_by("pk").values_list("pk", flat=True)):
+        DropDownMenu.objects.filter(pk=pk).update(name="main" if index == 0 else f"menu-{pk}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0021_publishedpayload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dropdownmenu",
+            name="name",
+            field=models.SlugField(max_length=64, null=True),
+        ),
+        migrations.RunPython(name_menus, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="dropdownmenu",
+            name="name",
+            field=models.SlugField(
+                default="main",
+                help_text="served at /api/drop-down-menu/<name>; the 'main' menu is also served at /api/drop-down-menu",
+                max_length=64,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+STATUS_FIELD = models.CharField(
+    choices=[("pending", "pending"), ("processing", "processing"), ("ready", "ready"), ("failed", "failed")],
+    default="pending",
+    help_text="whether the thumbnail has been made",
+    max_length=16,
+)
+
+
+def mark_ready(apps, schema_editor):
+    # Rows saved so far got their thumbnail inline; only those without one still need it.
+    for model_name in ["ProductImage", "LandingPageImage"]:
+        model = apps.get_model("api", model_name)
+        model.objects.exclude(thumbnail="").exclude(thumbnail__isnull=True).update(processing_status="ready")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0022_dropdownmenu_name"),
+    ]
+
+    operations = [
+        migrations.AddField(model_name="productimage", name="processing_status", field=STATUS_FIELD),
+        migrations.AddField(model_name="landingpageimage", name="processing_status", field=STATUS_FIELD),
+        migrations.RunPython(mark_ready, migrations.RunPython.noop),
+    ]
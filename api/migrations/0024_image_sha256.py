@@ -0,0 +1,35 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0023_processing_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="image_sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the image, to tell a new file from the same one uploaded again",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the image, to tell a new file from the same one uploaded again",
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0024_image_sha256"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="resized copies of the image, as {format: {width: name}}",
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="resized copies of the image, as {format: {width: name}}",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:24
+
+import api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0025_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="menulistitem",
+            name="image_sha256",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                help_text="SHA-256 of the image, to tell a new file from the same one uploaded again",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="processing_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "pending"),
+                    ("processing", "processing"),
+                    ("ready", "ready"),
+                    ("failed", "failed"),
+                ],
+                default="pending",
+                help_text="whether the thumbnail has been made",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="thumbnail",
+            field=api.models.CloudFrontImageField(
+                blank=True,
+                default=None,
+                help_text="thumbnail of image",
+                null=True,
+                upload_to=api.models.LowercaseRename(""),
+            ),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="resized copies of the image, as {format: {width: name}}",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.9 on 2026-10-18 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0026_menu_list_item_processing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="image_bytes",
+            field=models.PositiveBigIntegerField(editable=False, help_text="size of the image file", null=True),
+        ),
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="image_format",
+            field=models.CharField(
+                blank=True, default="", editable=False, help_text="format of the image, as PIL names it", max_length=16
+            ),
+        ),
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="image_height",
+            field=models.PositiveIntegerField(editable=False, help_text="height of the image in pixels", null=True),
+        ),
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="image_width",
+            field=models.PositiveIntegerField(editable=False, help_text="width of the image in pixels", null=True),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="image_bytes",
+            field=models.PositiveBigIntegerField(editable=False, help_text="size of the image file", null=True),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="image_format",
+            field=models.CharField(
+                blank=True, default="", editable=False, help_text="format of the image, as PIL names it", max_length=16
+            ),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="image_height",
+            field=models.PositiveIntegerField(editable=False, help_text="height of the image in pixels", null=True),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="image_width",
+            field=models.PositiveIntegerField(editable=False, help_text="width of the image in pixels", null=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_bytes",
+            field=models.PositiveBigIntegerField(editable=False, help_text="size of the image file", null=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_format",
+            field=models.CharField(
+                blank=True, default="", editable=False, help_text="format of the image, as PIL names it", max_length=16
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_height",
+            field=models.PositiveIntegerField(editable=False, help_text="height of the image in pixels", null=True),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="image_width",
+            field=models.PositiveIntegerField(editable=False, help_text="width of the image in pixels", null=True),
+        ),
+    ]
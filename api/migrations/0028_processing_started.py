@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0027_image_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingpageimage",
+            name="processing_started",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="when a worker claimed the image, to tell a stopped job from one still running",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="menulistitem",
+            name="processing_started",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="when a worker claimed the image, to tell a stopped job from one still running",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="processing_started",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="when a worker claimed the image, to tell a stopped job from one still running",
+                null=True,
+            ),
+        ),
+    ]
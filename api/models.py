@@ -1,16 +1,58 @@
+import hashlib
 import os
-import time
-from io import BytesIO
+import re
+import tempfile
+from contextlib import contextmanager
 
-import boto3
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.exceptions import ValidationError
+from django.core.files.base import File
 from django.db import models
 from django.db.models.fields.files import ImageFieldFile
 from django.utils.deconstruct import deconstructible
 from PIL import Image
 from django.utils.html import format_html
 
+from . import cdn, stats
+
+
+def slugify_name(name):
+    """
+    Canonical url slug for a catalog name: lowercased, apostrophes dropped and spaces hyphenated,
+    so "Captain's Chair" becomes "captains-chair".
+    """
+    return name.lower().replace("'", "").replace("\u2019", "").replace(" ", "-")
+
+
+class SlugMixin(models.Model):
+    """
+    Keeps a unique, indexed ``slug`` column in sync with ``name`` so the api can look records up by slug.
+    """
+
+    slug = models.SlugField(
+        help_text="url slug, generated from the name", max_length=255, unique=True, allow_unicode=True, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def slugify(self):
+        return slugify_name(self.name)
+
+    def clean(self):
+        super().clean()
+        if type(self).objects.filter(slug=self.slugify()).exclude(pk=self.pk).exists():
+            message = f"Another {self._meta.verbose_name} already uses the slug {self.slugify()}"
+            raise ValidationError({"name": message})
+
+    def save(self, *args, **kwargs):
+        self.slug = self.slugify()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "slug"}
+        super().save(*args, **kwargs)
+
+
 @deconstructible
 class LowercaseRename(object):
     def __init__(self, path):
@@ -23,31 +65,213 @@ class LowercaseRename(object):
         return os.path.join(self.path, filename)
 
 
-class CloudFrontImageFieldFile(ImageFieldFile):
-    def create_invalidation(self):
+# A content-addressed name: the SHA-256 of the file's bytes and its extension.
+CONTENT_HASH_NAME = re.compile(r"(^|/)[0-9a-f]{64}\.[0-9a-z]+$")
+
 
-        if settings.SETTINGS_MODULE in ["config.settings.production", 'config.settings.staging']:
+def content_hash(content):
+    """
+    The SHA-256 hex digest of ``content``, taken from the upload handler when it already worked it out.
+    """
+    digest = getattr(content, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    return sha256.hexdigest()
 
-            client = boto3.client(
-                "cloudfront",
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name="us-east-1",  # Specify the appropriate region
-            )
 
-            distribution_id = settings.CLOUDFLARE_DISTRIBUTION_ID
-            path = "/" + self.name
-            client.create_invalidation(
-                DistributionId=distribution_id,
-                InvalidationBatch={"Paths": {"Quantity": 1, "Items": [path]}, "CallerReference": str(time.time())},
-            )
+class CloudFrontImageFieldFile(ImageFieldFile):
+    def create_invalidation(self):
+        cdn.invalidate(self.name)
+
+    def save(self, name, content, save=True):
+        """
+        With API_CONTENT_HASH_NAMES, store ``content`` under the hash of its bytes instead of ``name``.
+        Such a name never points at different bytes, so it is never overwritten or invalidated, and a
+        file that is already stored is not uploaded again.
+        """
+        if not settings.API_CONTENT_HASH_NAMES:
+            return super().save(name, content, save)
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = content_hash(content) + os.path.splitext(name)[1].lower()
+        stored_name = self.field.generate_filename(self.instance, name)
+        if not self.storage.exists(stored_name):
+            return super().save(name, content, save)
+        self.name = stored_name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
 
 
 class CloudFrontImageField(models.ImageField):
     attr_class = CloudFrontImageFieldFile
 
 
-class Product(models.Model):
+METADATA_FIELDS = ["image_sha256", "image_width", "image_height", "image_bytes", "image_format"]
+
+
+def image_metadata(file):
+    """
+    The values of ``METADATA_FIELDS`` for an image ``file``: its size, its SHA-256 and, from the
+    header alone, its dimensions and format, which are left empty when PIL can't identify the file.
+    """
+    metadata = {"image_sha256": content_hash(file), "image_bytes": file.size}
+    metadata.update(image_width=None, image_height=None, image_format="")
+    file.seek(0)
+    try:
+        # Image.open only reads the header; the pixels are never decoded here.
+        img = Image.open(file)
+        metadata.update(image_width=img.width, image_height=img.height, image_format=img.format or "")
+    except OSError:
+        pass
+    file.seek(0)
+    return metadata
+
+
+# The box thumbnails are shrunk to fit.
+THUMBNAIL_SIZE = (300, 300)
+
+# Counters in api.stats: thumbnails made, and uploads found to be the image already stored.
+IMAGES_PROCESSED = "images_processed"
+IMAGES_UNCHANGED = "images_unchanged"
+
+
+class ProcessedImageMixin(models.Model):
+    """
+    For models with an ``image``, its ``thumbnail`` and its ``variants``, the resized copies of
+    ``api.derivatives``. Saving a new image only marks the row as pending; ``api.processing`` makes
+    the thumbnail and variants afterwards, and until then the original image stands in for them.
+    """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "pending"), (PROCESSING, "processing"), (READY, "ready"), (FAILED, "failed")]
+
+    processing_status = models.CharField(
+        help_text="whether the thumbnail has been made", max_length=16, choices=STATUS_CHOICES, default=PENDING
+    )
+    processing_started = models.DateTimeField(
+        help_text="when a worker claimed the image, to tell a stopped job from one still running",
+        null=True,
+        editable=False,
+    )
+    # Read from the upload when it is saved (see image_metadata), so nothing has to fetch the file later.
+    image_sha256 = models.CharField(
+        help_text="SHA-256 of the image, to tell a new file from the same one uploaded again",
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+    )
+    image_width = models.PositiveIntegerField(help_text="width of the image in pixels", null=True, editable=False)
+    image_height = models.PositiveIntegerField(help_text="height of the image in pixels", null=True, editable=False)
+    image_bytes = models.PositiveBigIntegerField(help_text="size of the image file", null=True, editable=False)
+    image_format = models.CharField(
+        help_text="format of the image, as PIL names it", max_length=16, blank=True, default="", editable=False
+    )
+    variants = models.JSONField(
+        help_text="resized copies of the image, as {format: {width: name}}", default=dict, blank=True, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    @property
+    def served_thumbnail(self):
+        return self.thumbnail if self.processing_status == self.READY and self.thumbnail else self.image
+
+    def variant_widths(self):
+        return settings.API_IMAGE_DERIVATIVE_WIDTHS
+
+    @contextmanager
+    def open_image(self):
+        """
+        The image as an open PIL image, read from storage as a stream. Only the header has been read;
+        pixels are decoded on first use, and their buffers are freed once the block exits.
+        """
+        with self.image.open("rb"), Image.open(self.image) as img:
+            yield img
+
+    def make_thumbnail(self, img):
+        """
+        The ``(name, File)`` of a thumbnail of ``img``, the open image, that fits THUMBNAIL_SIZE, in the
+        image's own format. ``img`` is shrunk in place, so make the thumbnail last. It goes to a
+        spooled temporary file, which is handed to storage as it is; close it once it has been saved.
+        """
+        img.thumbnail(THUMBNAIL_SIZE)
+        thumb_file = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        img.save(thumb_file, img.format, quality=85)
+
+        root, ext = os.path.splitext(self.image.name)
+        file_name = f"{root}-thumb{ext}"
+        return file_name, File(thumb_file, file_name)
+
+    def store_thumbnail(self, name, content):
+        """
+        Save ``content`` as the thumbnail under ``name``, as ``make_thumbnail`` gives them. Returns
+        the stored names it overwrote, for the CDN to invalidate now that the new file is in place.
+        """
+        overwritten = None
+        if not settings.API_CONTENT_HASH_NAMES:
+            # Hashed names never point at different bytes; others are overwritten where storage allows it.
+            overwritten = self.thumbnail.field.generate_filename(self, name)
+            if not self.thumbnail.storage.exists(overwritten):
+                overwritten = None
+        self.thumbnail.save(name, content, save=False)
+        return [self.thumbnail.name] if self.thumbnail.name == overwritten else []
+
+    def read_image_metadata(self):
+        """
+        Fill the metadata columns from the new upload in ``image``.
+        """
+        for field, value in image_metadata(self.image.file).items():
+            setattr(self, field, value)
+
+    def keep_unchanged_image(self):
+        """
+        If ``image`` holds an upload with the same bytes and stored name as the current image, put the
+        stored file back, so the save neither uploads, invalidates nor reprocesses anything.
+        """
+        if self.pk is None:
+            return
+        stored = type(self).objects.filter(pk=self.pk).values_list("image", "image_sha256").first()
+        if stored == (upload_name(self), self.image_sha256):
+            self.image = stored[0]
+            stats.incr(IMAGES_UNCHANGED)
+
+    def reset_derivatives(self):
+        """
+        Get the row ready for storing a new ``image``, as ``save()`` does before writing it: keep the
+        stored file if the upload is the same, and otherwise drop the thumbnail and variants and mark
+        the row pending. Returns the fields it changed, for bulk updates.
+        """
+        if self.image and not self.image._committed:
+            self.read_image_metadata()
+            self.keep_unchanged_image()
+        invalidate_replaced_files([self])
+        if not self.image or self.image._committed:
+            return []
+        # The new thumbnail is made later, and invalidated once it is stored (see store_thumbnail).
+        self.thumbnail = None
+        self.variants = {}
+        self.processing_status = self.PENDING
+        return ["thumbnail", "variants", "processing_status", *METADATA_FIELDS]
+
+    def save(self, *args, **kwargs):
+        changed = self.reset_derivatives()
+        update_fields = kwargs.get("update_fields")
+        if changed and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *changed}
+        super().save(*args, **kwargs)
+
+
+class Product(SlugMixin, models.Model):
     name = models.CharField(help_text="The name you want to appear in the template", max_length=255)
     blurb = models.TextField(help_text="The blurb text that appears underneath the carousel", null=True, blank=True)
     meta = models.JSONField(null=True, blank=True)
@@ -57,9 +281,6 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
-    def slugify(self):
-        return self.name.lower().replace(" ", "-")
-
     def get_absolute_url(self):
         full_url = self.url.startswith('http')
         if not full_url:
@@ -78,7 +299,7 @@ class Product(models.Model):
         return len(ProductImage.objects.filter(product__pk=self.id))
 
 
-class ProductImage(models.Model):
+class ProductImage(ProcessedImageMixin, models.Model):
     product = models.ForeignKey(
         Product, help_text="image for what product?", related_name="images", on_delete=models.CASCADE
     )
@@ -94,26 +315,11 @@ class ProductImage(models.Model):
     class Meta:
         ordering = ["order"]
 
-    def save(self, *args, **kwargs):
-        self.image.create_invalidation()
-        img = Image.open(self.image)
-        img.thumbnail((300, 300))
-        thumb_io = BytesIO()
-        img.save(thumb_io, img.format, quality=85)
-
-        file_name = self.image.name
-        root, ext = os.path.splitext(file_name)
-        file_name = f"{root}-thumb{ext}"
-        thumb_file = ContentFile(thumb_io.getvalue(), file_name)
-
-        self.thumbnail.save(file_name, thumb_file, save=False)
-        super().save(*args, **kwargs)  # Save the instance only once, after the thumbnail is created
-
     def __str__(self):
         return f"{self.image} - {self.product.name} - # {self.order}"
 
 
-class LandingPageImage(models.Model):
+class LandingPageImage(ProcessedImageMixin, models.Model):
     image = CloudFrontImageField(help_text="upload your image here", upload_to=LowercaseRename(""))  # type: ignore
     thumbnail = (
         CloudFrontImageField(default=None, blank=True, null=True, help_text="thumbnail of image", upload_to=LowercaseRename(""))
@@ -124,26 +330,11 @@ class LandingPageImage(models.Model):
     class Meta:
         ordering = ["created_on"]
 
-    def save(self, *args, **kwargs):
-        self.image.create_invalidation()
-        img = Image.open(self.image)
-        img.thumbnail((300, 300))
-        thumb_io = BytesIO()
-        img.save(thumb_io, img.format, quality=85)
-
-        file_name = self.image.name
-        root, ext = os.path.splitext(file_name)
-        file_name = f"{root}-thumb{ext}"
-        thumb_file = ContentFile(thumb_io.getvalue(), file_name)
-
-        self.thumbnail.save(file_name, thumb_file, save=False)
-        super().save(*args, **kwargs)  # Save the instance only once, after the thumbnail is created
-
     def __str__(self):
         return f"{self.image}"
 
 
-class MenuList(models.Model):
+class MenuList(SlugMixin, models.Model):
     name = models.CharField(help_text="name appears at the top of the menu template", max_length=255)
     created_on = models.DateTimeField(auto_now_add=True)
     meta = models.JSONField(null=True, blank=True)
@@ -152,9 +343,6 @@ class MenuList(models.Model):
     def __str__(self):
         return self.name
 
-    def slugify(self):
-        return self.name.lower().replace(" ", "-")
-
     def get_absolute_url(self):
 
         return f"https://bddw.com/list/{self.slugify()}"
@@ -167,7 +355,7 @@ class MenuList(models.Model):
         return len(MenuListItem.objects.filter(menu_list_id=self.id))
 
 
-class MenuListItem(models.Model):
+class MenuListItem(ProcessedImageMixin, models.Model):
     name = models.CharField(help_text="name of the menu item", max_length=255)
     menu_list = models.ForeignKey(
         MenuList,
@@ -178,6 +366,9 @@ class MenuListItem(models.Model):
     image = CloudFrontImageField(
         help_text="'thumbnail' image you want for this menu item", upload_to=LowercaseRename("")
     )
+    thumbnail = CloudFrontImageField(
+        default=None, blank=True, null=True, help_text="thumbnail of image", upload_to=LowercaseRename("")
+    )
     url = models.CharField(help_text="path for linking: /list/list-name or /product/product-name - outide links must start with http", max_length=255)
     order = models.IntegerField(help_text="order item to appear")
     updated_on = models.DateTimeField(auto_now=True)
@@ -197,9 +388,9 @@ class MenuListItem(models.Model):
         else:
             return self.url
 
-    def save(self, *args, **kwargs):
-        self.image.create_invalidation()
-        super().save(*args, **kwargs)
+    def variant_widths(self):
+        # Menu lists show their records as tiles, smaller than carousel images.
+        return settings.API_MENU_TILE_WIDTHS
 
     def __str__(self):
         return f"Menu List Item: {self.name}"
@@ -209,8 +400,82 @@ class MenuListItem(models.Model):
 
 
 class DropDownMenu(models.Model):
+    name = models.SlugField(
+        help_text="served at /api/drop-down-menu/<name>; the 'main' menu is also served at /api/drop-down-menu",
+        max_length=64,
+        unique=True,
+        default="main",
+    )
     data = models.JSONField(null=True, blank=True)
     updated_on = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"BDDW.COM DROPDOWN MENU {self.id}"
+        return f"BDDW.COM DROPDOWN MENU {self.name}"
+
+
+class PublishedPayload(models.Model):
+    """
+    The serialized ``api_response`` body of a MenuList or Product, stored as JSON bytes so reads
+    can skip the ORM and DRF entirely. Rebuilt by ``api.payloads`` whenever the record changes.
+    """
+
+    MENU_LIST = "menulist"
+    PRODUCT = "product"
+    KIND_CHOICES = [(MENU_LIST, "menu list"), (PRODUCT, "product")]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    slug = models.SlugField(max_length=255, allow_unicode=True)
+    content = models.BinaryField()
+    etag = models.CharField(max_length=64)
+    last_modified = models.DateTimeField()
+    version = models.PositiveIntegerField(help_text="payload format the content was rendered with")
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["kind", "object_id"], name="unique_published_payload")]
+
+    def __str__(self):
+        return f"{self.kind} payload: {self.slug}"
+
+
+def upload_name(instance, field_name="image"):
+    """
+    The name a file assigned to ``instance`` but not stored yet will be saved under, or ``None``
+    when the field holds no new file.
+    """
+    file = getattr(instance, field_name)
+    if not file or file._committed:
+        return None
+    name = file.name
+    if settings.API_CONTENT_HASH_NAMES:
+        name = content_hash(file.file) + os.path.splitext(name)[1].lower()
+    return instance._meta.get_field(field_name).generate_filename(instance, name)
+
+
+def published_names(names):
+    """
+    The ones among ``names`` that some row already serves, so the CDN may hold a copy. Names
+    nobody has served yet need no invalidation.
+    """
+    names = {name for name in names if name}
+    if not names:
+        return set()
+    querysets = [
+        model.objects.filter(**{f"{field}__in": names}).order_by().values_list(field, flat=True)
+        for model in [ProductImage, LandingPageImage, MenuListItem]
+        for field in ["image", "thumbnail"]
+    ]
+    return set(querysets[0].union(*querysets[1:]))
+
+
+def invalidate_replaced_files(instances, field_name="image"):
+    """
+    Before saving ``instances``: queue a CDN invalidation, sent once the transaction commits, for
+    each new upload that will overwrite a file that is already being served.
+    """
+    if settings.API_CONTENT_HASH_NAMES:
+        # New uploads get new names, so nothing that is served changes.
+        return
+    names = [upload_name(instance, field_name) for instance in instances]
+    cdn.invalidate(*published_names(names))
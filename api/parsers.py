@@ -0,0 +1,65 @@
+import re
+
+from django.conf import settings
+from django.utils.datastructures import MultiValueDict
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, FormParser, MultiPartParser
+
+# "images[0].caption" -> ("images", "0", "caption")
+INDEXED_KEY = re.compile(r"^(\w+)\[(\d+)\]\.(\w+)$")
+
+
+class FormData(dict):
+    """
+    A parsed form as plain, nested data. Its strings are form text, so JSON fields decode them as
+    they would a QueryDict's (see ``StoredJSONField``).
+    """
+
+    def copy(self):
+        return type(self)(self)
+
+
+def nest(items, max_items):
+    """
+    Gather ``(key, value)`` pairs into a ``FormData``, turning indexed keys such as
+    ``records[2].name`` into a list of dicts under ``records``, ordered by index. Gaps are closed
+    up and a repeated key keeps its last value. Indexes must be below ``max_items``.
+    """
+    data = FormData()
+    indexed = {}
+    for key, value in items:
+        match = INDEXED_KEY.match(key)
+        if match is None:
+            data[key] = value
+            continue
+        name, index, field = match.groups()
+        if int(index) >= max_items:
+            raise ParseError(f"{key}: {name} may have at most {max_items} items.")
+        indexed.setdefault(name, {}).setdefault(int(index), {})[field] = value
+    for name, rows in indexed.items():
+        data[name] = [rows[index] for index in range(max(rows) + 1) if index in rows]
+    return data
+
+
+class NestedFormParser(FormParser):
+    """
+    FormParser whose ``request.data`` is a ``FormData``, with indexed keys nested as ``nest`` does.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        return nest(parsed.items(), settings.API_FORM_MAX_ITEMS)
+
+
+class NestedMultiPartParser(MultiPartParser):
+    """
+    MultiPartParser whose ``request.data`` is a ``FormData``, with indexed keys nested as ``nest``
+    does, files included; the uploads stay the handles the upload handlers made. Files under plain
+    keys are also left in ``request.FILES``.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parsed = super().parse(stream, media_type, parser_context)
+        data = nest([*parsed.data.items(), *parsed.files.items()], settings.API_FORM_MAX_ITEMS)
+        files = MultiValueDict({key: files for key, files in parsed.files.lists() if not INDEXED_KEY.match(key)})
+        return DataAndFiles(data, files)
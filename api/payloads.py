@@ -0,0 +1,175 @@
+from django.db.models import Exists, OuterRef
+
+from .batching import OnCommitBatch
+from .cache import bump_catalog_version, get_cached_entries, retire_cached_entries, set_cached_entries
+from .catalog import CATALOG_MODELS, MENU_LIST, catalog_validators, read_queryset, resolve_slugs
+from .conditional import PAYLOAD_VERSION, timestamp
+from .models import MenuList, PublishedPayload
+from .renderers import render_json
+from .serializers import MenuListSerializer, ProductSerializer
+
+
+def render_body(instance):
+    """
+    JSON bytes of the serialized ``body`` that ``api_response`` returns for an instance from ``read_queryset``.
+    """
+    serializer_class = MenuListSerializer if isinstance(instance, MenuList) else ProductSerializer
+    return render_json(serializer_class(instance).data)
+
+
+def as_entry(payload):
+    """
+    The cacheable parts of a PublishedPayload row.
+    """
+    return {
+        "kind": payload.kind,
+        "content": bytes(payload.content),
+        "etag": payload.etag,
+        "last_modified": timestamp(payload.last_modified),
+    }
+
+
+def publish(kind, pk):
+    """
+    Rebuild the stored payload of one MenuList or Product and retire its cache entries, under both
+    the old and the new slug. Returns the PublishedPayload, or ``None`` when the record is gone.
+    """
+    payloads = PublishedPayload.objects.filter(kind=kind, object_id=pk)
+    stale_slugs = set(payloads.values_list("slug", flat=True))
+    instance = read_queryset(kind).filter(pk=pk).first()
+
+    if instance is None:
+        payloads.delete()
+        retire_cached_entries(stale_slugs)
+        bump_catalog_version()
+        return None
+
+    etag, last_modified = catalog_validators(instance)
+    payload, _ = PublishedPayload.objects.update_or_create(
+        kind=kind,
+        object_id=pk,
+        defaults={
+            "slug": instance.slug,
+            "content": render_body(instance),
+            "etag": etag,
+            "last_modified": last_modified,
+            "version": PAYLOAD_VERSION,
+        },
+    )
+    retire_cached_entries(stale_slugs | {instance.slug})
+    bump_catalog_version()
+    return payload
+
+
+def publish_many(items):
+    for kind, pk in items:
+        publish(kind, pk)
+
+
+# Saving a product with thirty images republishes it once, after the transaction commits.
+publish_batch = OnCommitBatch(publish_many)
+
+
+def schedule_publish(kind, pk):
+    publish_batch.add((kind, pk))
+
+
+def get_published(slug):
+    """
+    The current PublishedPayload for a canonical slug, or ``None``. Menu lists win over products,
+    and rows rendered by an older payload format are rebuilt on the way out.
+    """
+    return get_published_many([slug]).get(slug)
+
+
+def get_published_many(slugs):
+    """
+    ``get_published`` for many canonical slugs in one query; slugs without a payload are left out.
+    A product payload is only served if no menu list has its slug, whether or not that menu list
+    has been published yet; if one does, the menu list is published in its place.
+    """
+    published = {}
+    payloads = PublishedPayload.objects.filter(slug__in=set(slugs)).annotate(
+        shadowed=Exists(MenuList.objects.filter(slug=OuterRef("slug")))
+    )
+    for payload in payloads:
+        if payload.kind == MENU_LIST or payload.slug not in published:
+            published[payload.slug] = payload
+
+    shadowed = {slug for slug, payload in published.items() if payload.kind != MENU_LIST and payload.shadowed}
+    for slug, payload in published.items():
+        if slug in shadowed:
+            published[slug] = None
+        elif payload.version != PAYLOAD_VERSION:
+            published[slug] = publish(payload.kind, payload.object_id)
+    published = {slug: payload for slug, payload in published.items() if payload is not None}
+    published.update(publish_slugs(shadowed))
+    return published
+
+
+def publish_slugs(slugs):
+    """
+    Publish the records behind canonical slugs that have no payload yet, resolving them in one query.
+    Slugs that match nothing are left out of the result.
+    """
+    published = {slug: publish(kind, pk) for slug, (kind, pk) in resolve_slugs(slugs).items()}
+    return {slug: payload for slug, payload in published.items() if payload is not None}
+
+
+def load_entries(slugs):
+    """
+    Cache entries for many canonical slugs: from the cache where possible, then the PublishedPayload
+    table, publishing whatever is still missing. Slugs that match no record are left out.
+
+    Once every record has been published this is two cache round trips and at most one query.
+    """
+    entries, versions = get_cached_entries(slugs)
+    missing = set(slugs) - set(entries)
+
+    if missing:
+        published = get_published_many(missing)
+        missing -= set(published)
+        if missing:
+            published.update(publish_slugs(missing))
+
+        fresh = {slug: as_entry(payload) for slug, payload in published.items()}
+        set_cached_entries(fresh, versions)
+        entries.update(fresh)
+
+    return entries
+
+
+def rebuild_all():
+    """
+    Republish every MenuList and Product and remove payloads whose record no longer exists.
+    Returns the number of payloads written.
+    """
+    written = 0
+    for kind, model in CATALOG_MODELS.items():
+        pks = set(model.objects.values_list("pk", flat=True))
+        PublishedPayload.objects.filter(kind=kind).exclude(object_id__in=pks).delete()
+        for pk in sorted(pks):
+            publish(kind, pk)
+            written += 1
+    return written
+
+
+def find_inconsistencies():
+    """
+    Yield ``(kind, pk, problem)`` for each record whose stored payload is missing, out of date
+    or no longer matches what the serializers produce, and for payloads without a record.
+    """
+    for kind, model in CATALOG_MODELS.items():
+        payloads = {payload.object_id: payload for payload in PublishedPayload.objects.filter(kind=kind)}
+        for instance in read_queryset(kind).iterator(chunk_size=200):
+            payload = payloads.pop(instance.pk, None)
+            if payload is None:
+                yield kind, instance.pk, "missing"
+            elif payload.version != PAYLOAD_VERSION:
+                yield kind, instance.pk, "old format"
+            elif payload.slug != instance.slug:
+                yield kind, instance.pk, "wrong slug"
+            elif bytes(payload.content) != render_body(instance):
+                yield kind, instance.pk, "stale content"
+        for object_id in payloads:
+            yield kind, object_id, "orphaned"
@@ -0,0 +1,133 @@
+import logging
+import resource
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from . import cdn, derivatives, stats
+from .batching import OnCommitBatch
+from .models import IMAGES_PROCESSED, THUMBNAIL_SIZE, LandingPageImage, MenuListItem, ProcessedImageMixin, ProductImage
+
+logger = logging.getLogger("watchtower")
+
+QUEUE_KEY = "api:image-processing"
+PROCESSED_MODELS = {model._meta.model_name: model for model in [ProductImage, LandingPageImage, MenuListItem]}
+
+# Sent with the ``instance`` once its thumbnail is stored; the row itself is written with update().
+image_processed = Signal()
+
+
+def enqueue_many(items):
+    """
+    Queue ``(model name, pk)`` pairs for the ``process_images`` workers, or with
+    API_IMAGE_PROCESSING_INLINE process them right here, as development and tests do.
+    """
+    if settings.API_IMAGE_PROCESSING_INLINE:
+        for model_name, pk in sorted(items):
+            process_image(model_name, pk)
+        return
+    get_redis_connection("default").lpush(QUEUE_KEY, *[f"{model_name}:{pk}" for model_name, pk in items])
+
+
+# Queued once the transaction commits, so workers never look for rows that aren't visible yet.
+processing_batch = OnCommitBatch(enqueue_many)
+
+
+def schedule_processing(instance):
+    processing_batch.add((instance._meta.model_name, instance.pk))
+
+
+def pop(timeout):
+    """
+    Wait up to ``timeout`` seconds for the next queued ``(model name, pk)``; ``None`` if there is none.
+    """
+    item = get_redis_connection("default").brpop(QUEUE_KEY, timeout=timeout)
+    if item is None:
+        return None
+    model_name, pk = item[1].decode().split(":")
+    return model_name, int(pk)
+
+
+def process_image(model_name, pk):
+    """
+    Make and store the thumbnail and variants of one image row. The row is claimed by moving it from
+    pending (or failed) to processing with the time it started, so a job queued twice runs once, and
+    it is only marked ready if the claim is still this one and its image is still the one they were
+    made from. Returns whether the row is now ready.
+    """
+    model = PROCESSED_MODELS[model_name]
+    statuses = [ProcessedImageMixin.PENDING, ProcessedImageMixin.FAILED]
+    claimed = timezone.now()
+    if not model.objects.filter(pk=pk, processing_status__in=statuses).update(
+        processing_status=model.PROCESSING, processing_started=claimed
+    ):
+        return False
+    claim = model.objects.filter(pk=pk, processing_status=model.PROCESSING, processing_started=claimed)
+
+    instance = model.objects.get(pk=pk)
+    started = time.monotonic()
+    try:
+        with instance.open_image() as img:
+            (width, height), image_format = img.size, img.format
+            todo = derivatives.missing(instance.variants, width, instance.variant_widths())
+            derivatives.reduce_decode(img, [w for _, w in todo], THUMBNAIL_SIZE)
+            img.load()
+            decoded, decoded_bytes = img.size, derivatives.pixel_bytes(img)
+            variants, replaced = derivatives.make_variants(instance.image, img, instance.variants, todo)
+            name, content = instance.make_thumbnail(img)
+        with content:
+            replaced.extend(instance.store_thumbnail(name, content))
+        # A re-uploaded image gets derivatives under names the CDN may already serve; they are only
+        # invalidated once the new files are stored, so the CDN can't cache the old ones again.
+        cdn.invalidate(*replaced)
+    except Exception:
+        logger.exception(f"Could not make the thumbnail of {model_name} {pk}")
+        claim.update(processing_status=model.FAILED)
+        return False
+
+    done = claim.filter(image=instance.image.name).update(
+        thumbnail=instance.thumbnail.name,
+        variants=variants,
+        # Rows whose image was never uploaded through save(), such as imported names, get these here.
+        image_width=width,
+        image_height=height,
+        image_format=image_format,
+        processing_status=model.READY,
+        updated_on=timezone.now(),
+    )
+    # ru_maxrss is in kilobytes on Linux, and is the whole worker's peak, shared by its threads.
+    logger.info(
+        f"Processed {model_name} {pk} in {time.monotonic() - started:.2f}s: decoded {decoded[0]}x{decoded[1]} "
+        f"of {width}x{height}, {decoded_bytes / 2**20:.1f} MB of pixels, "
+        f"worker peak {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    )
+    if done:
+        stats.incr(IMAGES_PROCESSED)
+        instance.processing_status, instance.variants = model.READY, variants
+        image_processed.send(sender=model, instance=instance)
+    return bool(done)
+
+
+def requeue():
+    """
+    Queue every image that is still pending or failed, e.g. after a worker was stopped mid-job.
+    Returns the number queued.
+    """
+    items = set()
+    stale = Q(processing_started__isnull=True) | Q(
+        processing_started__lt=timezone.now() - timedelta(seconds=settings.API_IMAGE_PROCESSING_TIMEOUT)
+    )
+    for model_name, model in PROCESSED_MODELS.items():
+        # Rows left in processing by a stopped worker are retried too, but not those another
+        # worker is still making, which are only taken to be stopped after API_IMAGE_PROCESSING_TIMEOUT.
+        model.objects.filter(stale, processing_status=model.PROCESSING).update(processing_status=model.PENDING)
+        pks = model.objects.filter(processing_status__in=[model.PENDING, model.FAILED]).values_list("pk", flat=True)
+        items.update((model_name, pk) for pk in pks)
+    if items:
+        enqueue_many(items)
+    return len(items)
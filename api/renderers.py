@@ -0,0 +1,99 @@
+import json
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements/base.txt
+    orjson = None
+
+
+class PreEncoded(bytes):
+    """
+    JSON that is already encoded, such as a stored payload, for the renderer to write as it is.
+    """
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that writes bytes with orjson when it is installed and passes ``PreEncoded``
+    fragments through untouched. The output matches JSONRenderer's compact form; requests that ask
+    for an indented response are handed to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            return super().render(to_builtin(data), accepted_media_type, renderer_context)
+        if orjson is not None:
+            # Dates and times go through DRF's encoder so they keep its format, e.g. "Z" for UTC.
+            options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            content = orjson.dumps(data, default=_orjson_default, option=options)
+        else:
+            content = encode_with_fragments(data)
+        # Same as JSONRenderer: these are valid JSON but not valid JavaScript.
+        return content.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+def _orjson_default(obj):
+    if isinstance(obj, PreEncoded):
+        return orjson.Fragment(bytes(obj))
+    return JSONEncoder().default(obj)
+
+
+def encode_with_fragments(data):
+    """
+    The stdlib fallback: encode ``data`` compactly, swapping each ``PreEncoded`` value in afterwards.
+    """
+    fragments = []
+
+    def default(obj):
+        if isinstance(obj, PreEncoded):
+            fragments.append(bytes(obj))
+            return f"\x00fragment:{len(fragments) - 1}\x00"
+        return JSONEncoder().default(obj)
+
+    content = json.dumps(data, default=default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    for index, fragment in enumerate(fragments):
+        content = content.replace(f'"\\u0000fragment:{index}\\u0000"'.encode(), fragment, 1)
+    return content
+
+
+def to_builtin(data):
+    """
+    Decode any ``PreEncoded`` values so renderers that don't know about them can handle ``data``.
+    """
+    if isinstance(data, PreEncoded):
+        return json.loads(data)
+    if isinstance(data, dict):
+        return {key: to_builtin(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_builtin(value) for value in data]
+    return data
+
+
+class APIBrowsableAPIRenderer(BrowsableAPIRenderer):
+    def get_content(self, renderer, data, accepted_media_type, renderer_context):
+        return super().get_content(renderer, to_builtin(data), accepted_media_type, renderer_context)
+
+
+def get_json_renderer():
+    """
+    An instance of the renderer named by API_JSON_RENDERER.
+    """
+    return import_string(settings.API_JSON_RENDERER)()
+
+
+def render_json(data):
+    return get_json_renderer().render(data)
+
+
+def api_renderer_classes():
+    """
+    Renderers for the api app's views: the JSON renderer named by API_JSON_RENDERER, then the browsable api.
+    """
+    return [import_string(settings.API_JSON_RENDERER), APIBrowsableAPIRenderer]
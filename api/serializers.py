@@ -1,6 +1,86 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import DropDownMenu, LandingPageImage, MenuList, MenuListItem, Product, ProductImage
+from .models import (
+    DropDownMenu,
+    LandingPageImage,
+    MenuList,
+    MenuListItem,
+    Product,
+    ProductImage,
+    invalidate_replaced_files,
+    slugify_name,
+)
+from .parsers import FormData
+from .processing import schedule_processing
+from .renderers import PreEncoded
+
+
+class SlugNameMixin:
+    """
+    Rejects names whose slug is already used by another record of the same model.
+    """
+
+    def validate_name(self, value):
+        others = self.Meta.model.objects.filter(slug=slugify_name(value))
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise serializers.ValidationError(f"The slug {slugify_name(value)} is already in use.")
+        return value
+
+
+class JSONText(str):
+    # Marks a string for JSONField to decode, as it does with values from a QueryDict.
+    is_json_string = True
+
+
+class StoredJSONField(serializers.JSONField):
+    """
+    JSONField that hands the column's JSON text to the renderer as ``PreEncoded`` when the queryset
+    annotated it as ``<source>_json``, as ``read_queryset`` does, so it is never decoded and encoded again.
+    Text from a parsed form is decoded like a QueryDict's.
+    """
+
+    def get_value(self, dictionary):
+        value = super().get_value(dictionary)
+        if isinstance(dictionary, FormData) and isinstance(value, str):
+            return JSONText(value)
+        return value
+
+    def get_attribute(self, instance):
+        stored = getattr(instance, f"{self.source}_json", serializers.empty)
+        if stored is serializers.empty:
+            return super().get_attribute(instance)
+        return None if stored is None else PreEncoded(stored.encode())
+
+
+class NewImageMixin:
+    """
+    For nested image rows matched by ``id``: rows without one are new and must come with a file.
+    """
+
+    def validate(self, attrs):
+        if "id" not in attrs and "image" not in attrs:
+            raise serializers.ValidationError({"image": "New images need an image file."})
+        return super().validate(attrs)
+
+
+def validate_nested_ids(instance, related_name, rows):
+    """
+    Check that the ``id`` of each nested row is unique and belongs to ``instance``'s ``related_name`` rows.
+    """
+    ids = [row["id"] for row in rows if "id" in row]
+    if len(ids) != len(set(ids)):
+        raise serializers.ValidationError("Each id may appear only once.")
+    if instance is not None and ids:
+        unknown = set(ids) - set(getattr(instance, related_name).values_list("id", flat=True))
+        if unknown:
+            raise serializers.ValidationError(
+                f"{sorted(unknown)} do not belong to this {instance._meta.verbose_name}."
+            )
+    return rows
 
 
 class DropDownMenuSerializer(serializers.ModelSerializer):
@@ -14,26 +94,41 @@ class ImageNameField(serializers.ImageField):
         return value.name if value else None
 
 
+class ThumbnailField(ImageNameField):
+    """
+    The thumbnail once it has been made, and the original image until then.
+    """
+
+    def get_attribute(self, instance):
+        return instance.served_thumbnail
+
+
 class LandingPageImageSerializer(serializers.ModelSerializer):
     image = ImageNameField()
-    thumbnail = ImageNameField()
+    thumbnail = ThumbnailField()
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
 
     class Meta:
         model = LandingPageImage
-        fields = ["image", "thumbnail"]
+        fields = ["image", "thumbnail", "variants", "width", "height"]
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
-
-    image = ImageNameField()
-    thumbnail = ImageNameField()
+class ProductImageSerializer(NewImageMixin, serializers.ModelSerializer):
+    # Writable so a product update can match incoming images to its existing rows.
+    id = serializers.IntegerField(required=False)
+    image = ImageNameField(required=False)
+    thumbnail = ThumbnailField(required=False)
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
 
     class Meta:
         model = ProductImage
-        fields = ['id', "image", "thumbnail", "order", "caption"]
+        fields = ['id', "image", "thumbnail", "variants", "width", "height", "order", "caption"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SlugNameMixin, serializers.ModelSerializer):
+    meta = StoredJSONField(required=False, allow_null=True)
     images = ProductImageSerializer(many=True, read_only=False)
 
     class Meta:
@@ -47,54 +142,219 @@ class ProductSerializer(serializers.ModelSerializer):
         product = Product.objects.create(**validated_data)
 
         for image_data in images_data:
+            image_data.pop("id", None)
             ProductImage.objects.create(product=product, **image_data)
 
         return product
 
+    def validate_images(self, value):
+        return validate_nested_ids(self.instance, "images", value)
+
     def update(self, instance, validated_data):
         images_data = validated_data.pop("images", None)
-        instance = super().update(instance, validated_data)
+        # The product save schedules its republish for the commit, after the images below are written.
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
 
-        if images_data is not None:
-            instance.images.all().delete()
-            for image_data in images_data:
-                ProductImage.objects.create(product=instance, **image_data)
+            if images_data is not None:
+                self.reconcile_images(instance, images_data)
 
         return instance
 
+    def reconcile_images(self, instance, images_data):
+        """
+        Bring the product's images in line with ``images_data``, matching rows by ``id``. Only rows
+        that get a new file are saved one by one, which regenerates their thumbnail; order and caption
+        changes are written in a single bulk update, images without an id are created and images that
+        are left out are deleted. A list without ids therefore replaces every image, as it always has.
+        """
+        existing = {image.pk: image for image in instance.images.all()}
+        changed = []
+        now = timezone.now()
 
-class MenuListItemSerializer(serializers.ModelSerializer):
-    image = ImageNameField()  # Assuming ImageNameField is a custom field you've defined
+        for image_data in images_data:
+            image = existing.pop(image_data.pop("id", None), None)
+            if image is None:
+                ProductImage.objects.create(product=instance, **image_data)
+            elif image_data.keys() & {"image", "thumbnail"}:
+                for field, value in image_data.items():
+                    setattr(image, field, value)
+                image.save()
+            elif any(getattr(image, field) != value for field, value in image_data.items()):
+                for field, value in image_data.items():
+                    setattr(image, field, value)
+                image.updated_on = now
+                changed.append(image)
+
+        if changed:
+            ProductImage.objects.bulk_update(changed, ["order", "caption", "updated_on"])
+        if existing:
+            instance.images.filter(pk__in=existing).delete()
+
+
+class MenuListItemSerializer(NewImageMixin, serializers.ModelSerializer):
+    # Writable so a menu list update can match incoming records to its existing rows.
+    id = serializers.IntegerField(required=False)
+    image = ImageNameField(required=False)  # Assuming ImageNameField is a custom field you've defined
+    thumbnail = ThumbnailField(read_only=True)
+    width = serializers.IntegerField(source="image_width", read_only=True)
+    height = serializers.IntegerField(source="image_height", read_only=True)
 
     class Meta:
         model = MenuListItem
-        fields = ['id', "name", "image", "url", "order"]
+        fields = ['id', "name", "image", "thumbnail", "variants", "width", "height", "url", "order"]
 
 
-class MenuListSerializer(serializers.ModelSerializer):
+class MenuListSerializer(SlugNameMixin, serializers.ModelSerializer):
+    meta = StoredJSONField(required=False, allow_null=True)
     records = MenuListItemSerializer(many=True, read_only=False, source="MenuListItems")
 
     class Meta:
         model = MenuList
         fields = ['id', "name", "meta", "records"]
 
+    def validate_records(self, value):
+        return validate_nested_ids(self.instance, "MenuListItems", value)
+
     def create(self, validated_data):
-        print("Validated data:", validated_data)
         records_data = validated_data.pop("MenuListItems")
-        menu_list = MenuList.objects.create(**validated_data)
-        for record_data in records_data:
-            MenuListItem.objects.create(menu_list=menu_list, **record_data)
+        with transaction.atomic():
+            menu_list = MenuList.objects.create(**validated_data)
+            self.upsert_records(menu_list, records_data)
         return menu_list
 
     def update(self, instance, validated_data):
-        records_data = validated_data.pop("records", None)
-        instance.name = validated_data.get("name", instance.name)
-        instance.save()
+        records_data = validated_data.pop("MenuListItems", None)
+        # The menu list save schedules its republish for the commit, after the records below are written.
+        with transaction.atomic():
+            instance.name = validated_data.get("name", instance.name)
+            instance.meta = validated_data.get("meta", instance.meta)
+            instance.save()
 
-        if records_data is not None:
-            # Clear existing records and create new ones
-            instance.MenuListItems.all().delete()
-            for record_data in records_data:
-                MenuListItem.objects.create(menu_list=instance, **record_data)
+            if records_data is not None:
+                self.upsert_records(instance, records_data)
 
         return instance
+
+    def upsert_records(self, instance, records_data):
+        """
+        Bring the menu list's records in line with ``records_data``, matching rows by ``id``: new
+        records go in with one bulk insert, changed ones with one bulk update and the ones left out
+        are deleted. A list without ids therefore replaces every record, as it always has.
+
+        Bulk writes skip ``MenuListItem.save``, so what it does for a new image happens here: uploads
+        that replace a served file are queued for invalidation, to go out together in one CloudFront
+        request once the transaction commits, and the rows are queued for processing.
+        """
+        existing = {record.pk: record for record in instance.MenuListItems.all()}
+        image_field = MenuListItem._meta.get_field("image")
+        new, changed = [], []
+        fields = ["name", "image", "url", "order"]
+        now = timezone.now()
+
+        for record_data in records_data:
+            record = existing.pop(record_data.pop("id", None), None)
+            if record is None:
+                new.append(MenuListItem(menu_list=instance, **record_data))
+                continue
+            if "image" not in record_data and all(getattr(record, k) == v for k, v in record_data.items()):
+                continue
+            for field, value in record_data.items():
+                setattr(record, field, value)
+            reset = record.reset_derivatives() if "image" in record_data else []
+            if reset:
+                # What save() would do: store the uploaded file and keep its name.
+                image_field.pre_save(record, add=False)
+                fields.extend(field for field in reset if field not in fields)
+            record.updated_on = now
+            changed.append(record)
+
+        if existing:
+            instance.MenuListItems.filter(pk__in=existing).delete()
+        if changed:
+            MenuListItem.objects.bulk_update(changed, [*fields, "updated_on"])
+        if new:
+            invalidate_replaced_files(new)
+            for record in new:
+                if record.image and not record.image._committed:
+                    record.read_image_metadata()
+            MenuListItem.objects.bulk_create(new)
+        for record in [*changed, *new]:
+            if record.processing_status == MenuListItem.PENDING:
+                schedule_processing(record)
+
+
+class ReorderSerializer(serializers.Serializer):
+    """
+    A new order for a product's images or a menu list's records: every id, each once, in the order
+    they should appear. Saving writes the rows that move in one bulk update and leaves the number
+    moved in ``moved``; bulk updates send no signals, so republishing is up to the caller. Rows
+    added or removed since validation make saving raise ``ValidationError``, with nothing written.
+    """
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def get_rows(self):
+        return self.instance.MenuListItems.all() if isinstance(self.instance, MenuList) else self.instance.images.all()
+
+    def validate_ids(self, value):
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Each id may appear only once.")
+        if set(value) != set(self.get_rows().values_list("pk", flat=True)):
+            raise serializers.ValidationError("List every id of this record's rows, and no others.")
+        return value
+
+    def update(self, instance, validated_data):
+        position = {pk: order for order, pk in enumerate(validated_data["ids"])}
+        now = timezone.now()
+        moved = []
+        # Locked, so a concurrent reorder waits; rows added or removed meanwhile are reported.
+        rows = list(self.get_rows().select_for_update().only("pk", "order"))
+        added = sorted({row.pk for row in rows} - set(position))
+        removed = sorted(set(position) - {row.pk for row in rows})
+        if added or removed:
+            raise serializers.ValidationError(
+                {"ids": [f"The rows changed while reordering: {added} were added and {removed} removed."]}
+            )
+        for row in rows:
+            if row.order != position[row.pk]:
+                row.order = position[row.pk]
+                row.updated_on = now
+                moved.append(row)
+        if moved:
+            type(moved[0]).objects.bulk_update(moved, ["order", "updated_on"])
+        self.moved = len(moved)
+        return instance
+
+
+class ImportImageSerializer(serializers.ModelSerializer):
+    # The name of a file uploaded with the import, or of one already in storage.
+    image = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = ProductImage
+        fields = ["image", "order", "caption"]
+
+
+class ImportProductSerializer(serializers.ModelSerializer):
+    images = ImportImageSerializer(many=True, required=False)
+
+    class Meta:
+        model = Product
+        fields = ["name", "blurb", "meta", "images"]
+
+
+class ImportRecordSerializer(serializers.ModelSerializer):
+    image = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = MenuListItem
+        fields = ["name", "image", "url", "order"]
+
+
+class ImportMenuListSerializer(serializers.ModelSerializer):
+    records = ImportRecordSerializer(many=True, required=False)
+
+    class Meta:
+        model = MenuList
+        fields = ["name", "meta", "records"]
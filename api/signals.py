@@ -0,0 +1,86 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .catalog import MENU_LIST, PRODUCT
+from .landing import invalidate_images, invalidate_pool
+from .menus import invalidate_menus
+from .models import DropDownMenu, LandingPageImage, MenuList, MenuListItem, Product, ProductImage
+from .payloads import schedule_publish
+from .processing import image_processed, schedule_processing
+
+
+@receiver(post_save, sender=MenuList)
+@receiver(post_delete, sender=MenuList)
+def republish_menu_list(sender, instance, **kwargs):
+    schedule_publish(MENU_LIST, instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def republish_product(sender, instance, **kwargs):
+    schedule_publish(PRODUCT, instance.pk)
+
+
+@receiver(post_save, sender=MenuListItem)
+@receiver(post_delete, sender=MenuListItem)
+def republish_menu_list_item(sender, instance, **kwargs):
+    schedule_publish(MENU_LIST, instance.menu_list_id)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def republish_product_image(sender, instance, **kwargs):
+    schedule_publish(PRODUCT, instance.product_id)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=LandingPageImage)
+@receiver(post_save, sender=MenuListItem)
+def process_new_image(sender, instance, **kwargs):
+    if instance.processing_status == instance.PENDING:
+        schedule_processing(instance)
+
+
+@receiver(image_processed, sender=ProductImage)
+def republish_processed_product_image(sender, instance, **kwargs):
+    schedule_publish(PRODUCT, instance.product_id)
+
+
+@receiver(image_processed, sender=MenuListItem)
+def republish_processed_menu_list_item(sender, instance, **kwargs):
+    schedule_publish(MENU_LIST, instance.menu_list_id)
+
+
+@receiver(image_processed, sender=LandingPageImage)
+def invalidate_processed_landing_page_image(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_images, [instance.pk]))
+
+
+@receiver(post_delete, sender=MenuListItem)
+def touch_menu_list(sender, instance, **kwargs):
+    # A removed row leaves no updated_on behind, so move the parent's forward for Last-Modified.
+    MenuList.objects.filter(pk=instance.menu_list_id).update(updated_on=timezone.now())
+
+
+@receiver(post_delete, sender=ProductImage)
+def touch_product(sender, instance, **kwargs):
+    Product.objects.filter(pk=instance.product_id).update(updated_on=timezone.now())
+
+
+@receiver(post_save, sender=LandingPageImage)
+@receiver(post_delete, sender=LandingPageImage)
+def invalidate_landing_page_images(sender, instance, created=False, **kwargs):
+    # The pool of pks only changes when an image is added or deleted.
+    if created or kwargs["signal"] is post_delete:
+        transaction.on_commit(invalidate_pool)
+    transaction.on_commit(partial(invalidate_images, [instance.pk]))
+
+
+@receiver(post_save, sender=DropDownMenu)
+@receiver(post_delete, sender=DropDownMenu)
+def invalidate_drop_down_menus(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_menus)
@@ -0,0 +1,28 @@
+from django.core.cache import cache
+
+STATS_KEY_PREFIX = "api:stats:"
+
+
+def incr(name, delta=1):
+    """
+    Bump a named counter shared by every worker through the default cache.
+    """
+    key = STATS_KEY_PREFIX + name
+    if not cache.add(key, delta, timeout=None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # The key was evicted between add() and incr(); start the count over.
+            cache.set(key, delta, timeout=None)
+
+
+def snapshot(names):
+    """
+    Return the current value of each named counter.
+    """
+    values = cache.get_many([STATS_KEY_PREFIX + name for name in names])
+    return {name: values.get(STATS_KEY_PREFIX + name, 0) for name in names}
+
+
+def reset(names):
+    cache.delete_many([STATS_KEY_PREFIX + name for name in names])
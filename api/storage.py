@@ -0,0 +1,20 @@
+from storages.backends.s3 import S3Storage
+
+from .models import CONTENT_HASH_NAME
+
+# A year, the longest max-age caches are expected to honour.
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={60 * 60 * 24 * 365}, immutable"
+
+
+class MediaS3Storage(S3Storage):
+    """
+    S3Storage for uploads. Objects named by the hash of their content (see API_CONTENT_HASH_NAMES)
+    never change, so they are sent with an immutable Cache-Control; everything else keeps
+    AWS_S3_OBJECT_PARAMETERS.
+    """
+
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        if CONTENT_HASH_NAME.search(name):
+            params["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+        return params
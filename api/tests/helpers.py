@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+
+def image_bytes(size=(600, 400), color="white", format="JPEG"):
+    content = BytesIO()
+    Image.new("RGB", size, color).save(content, format)
+    return content.getvalue()
+
+
+def jpeg(name="Bench.JPG", size=(1200, 800), color="white"):
+    return SimpleUploadedFile(name, image_bytes(size, color), content_type="image/jpeg")
+
+
+class MediaRootMixin:
+    """
+    Stores the test's files in a temporary MEDIA_ROOT, ``self.media_root``, removed afterwards.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+
+
+class RecordingBackend:
+    """
+    A CDN backend that keeps every batch of paths it is asked to invalidate in ``sent``. Tests opt
+    in with ``API_CDN_BACKEND="api.tests.helpers.RecordingBackend"`` and clear ``sent`` first.
+    """
+
+    sent = []
+
+    def invalidate(self, paths):
+        self.sent.append(paths)
@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import stats
+from api.cache import CACHE_HITS, CACHE_MISSES, get_cached_entry, set_cached_entry
+from api.models import MenuList, MenuListItem, Product, ProductImage
+
+
+class ApiResponseCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+    def test_second_get_is_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Lake Bench", blurb="walnut")
+
+        self.assertEqual(self.client.get("/api/lake-bench")["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/lake-bench")
+        # ATOMIC_REQUESTS wraps the view in a savepoint; nothing else should touch the database.
+        self.assertEqual([q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]], [])
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["body"]["blurb"], "walnut")
+        self.assertEqual(stats.snapshot([CACHE_HITS, CACHE_MISSES]), {CACHE_HITS: 1, CACHE_MISSES: 1})
+
+    def test_save_invalidates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Lake Bench", blurb="walnut")
+        self.client.get("/api/lake-bench")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.blurb = "oak"
+            product.save()
+
+        response = self.client.get("/api/lake-bench")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["body"]["blurb"], "oak")
+
+    def test_late_reader_cannot_restore_stale_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Lake Bench", blurb="walnut")
+        stale, version = get_cached_entry("lake-bench")
+        self.assertIsNone(stale)
+        stale = {"kind": "product", "content": b'{"blurb":"walnut"}', "etag": '"old"', "last_modified": 0}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.blurb = "oak"
+            product.save()
+        set_cached_entry("lake-bench", version, stale)
+
+        self.assertEqual(self.client.get("/api/lake-bench").json()["body"]["blurb"], "oak")
+
+    def test_rename_invalidates_old_slug(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Lake Bench")
+        self.client.get("/api/lake-bench")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(pk=product.pk)
+            product.name = "Pond Bench"
+            product.save()
+
+        self.assertEqual(self.client.get("/api/lake-bench").status_code, 404)
+
+    def test_child_change_invalidates_parent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            menu_list = MenuList.objects.create(name="Benches")
+        self.client.get("/api/benches")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuListItem(
+                menu_list_id=menu_list.pk, name="lake bench", image="lake.jpg", url="/product/lake-bench", order=1
+            ).save()
+
+        response = self.client.get("/api/benches")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(len(response.json()["body"]["records"]), 1)
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench", blurb="walnut")
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get("/api/lake-bench")["ETag"]
+
+        # Once from the cache and once after the entry is gone.
+        self.assertEqual(self.client.get("/api/lake-bench", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        cache.clear()
+        response = self.client.get("/api/lake-bench", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get("/api/lake-bench")["Last-Modified"]
+        response = self.client.get("/api/lake-bench", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_child_delete_changes_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.bulk_create([ProductImage(product=self.product, image="a.jpg", order=1)])[0]
+        etag = self.client.get("/api/lake-bench")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+
+        response = self.client.get("/api/lake-bench", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.catalog import MENU_LIST, PRODUCT, normalize_slug, read_queryset, resolve_slug
+from api.models import MenuList, MenuListItem, Product, ProductImage
+from api.payloads import publish, render_body
+
+
+class SlugTestCase(TestCase):
+
+    def test_slug_follows_name(self):
+        product = Product.objects.create(name="Captain's Chair")
+        self.assertEqual(product.slug, "captains-chair")
+
+        product.name = "Admiral's Chair"
+        product.save(update_fields=["name"])
+        product.refresh_from_db()
+        self.assertEqual(product.slug, "admirals-chair")
+
+    def test_duplicate_slug_fails_validation(self):
+        MenuList.objects.create(name="Sofas Collection")
+        with self.assertRaises(ValidationError):
+            MenuList(name="sofas collection").full_clean()
+
+    def test_normalize_slug(self):
+        self.assertEqual(normalize_slug("Sev-Drulo-Series"), "sev-drulo-series")
+        self.assertEqual(normalize_slug("robe-tile-coffe-table"), "robe-tile-coffee-table")
+
+
+class ResolveSlugTestCase(TestCase):
+
+    def test_resolves_product_in_one_query(self):
+        product = Product.objects.create(name="sev-drulo sofa")
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_slug("sev-drulo-sofa"), (PRODUCT, product.pk))
+
+    def test_menu_list_wins_over_product(self):
+        menu_list = MenuList.objects.create(name="Lighting")
+        Product.objects.create(name="lighting")
+        self.assertEqual(resolve_slug("lighting"), (MENU_LIST, menu_list.pk))
+
+    def test_no_match(self):
+        self.assertIsNone(resolve_slug("does-not-exist"))
+
+
+class ApiResponseTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+    def test_get_product(self):
+        Product.objects.create(name="Wall-mount Luggage Rack", blurb="oak")
+        response = self.client.get("/api/wall-mount-luggage-rack")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["body"]["name"], "Wall-mount Luggage Rack")
+
+    def test_get_missing(self):
+        response = self.client.get("/api/nothing-here")
+        self.assertEqual(response.status_code, 404)
+
+
+class PublishQueryCountTestCase(TestCase):
+    """
+    Rendering a payload costs the record and one query for its nested rows, however many rows there are.
+    """
+
+    def get_query_count(self, kind, pk):
+        # Measure a republish, so both calls take the same update path.
+        publish(kind, pk)
+        with CaptureQueriesContext(connection) as queries:
+            publish(kind, pk)
+        return len(queries)
+
+    def test_product_query_count_is_fixed(self):
+        product = Product.objects.create(name="Lake Bench")
+        ProductImage.objects.bulk_create([ProductImage(product=product, image="a.jpg", order=1)])
+        few = self.get_query_count(PRODUCT, product.pk)
+
+        ProductImage.objects.bulk_create(
+            [ProductImage(product=product, image=f"{i}.jpg", order=i) for i in range(2, 40)]
+        )
+        self.assertEqual(self.get_query_count(PRODUCT, product.pk), few)
+
+    def test_menu_list_query_count_is_fixed(self):
+        menu_list = MenuList.objects.create(name="Benches")
+        records = [
+            MenuListItem(menu_list=menu_list, name=f"bench {i}", image=f"{i}.jpg", url=f"/product/bench-{i}", order=i)
+            for i in range(60)
+        ]
+        MenuListItem.objects.bulk_create(records[:1])
+        few = self.get_query_count(MENU_LIST, menu_list.pk)
+
+        MenuListItem.objects.bulk_create(records[1:])
+        self.assertEqual(self.get_query_count(MENU_LIST, menu_list.pk), few)
+
+    def test_serializing_costs_two_queries(self):
+        product = Product.objects.create(name="Lake Bench")
+        ProductImage.objects.bulk_create([ProductImage(product=product, image=f"{i}.jpg", order=i) for i in range(40)])
+        with self.assertNumQueries(2):
+            render_body(read_queryset(PRODUCT).get(pk=product.pk))
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from api import cdn
+from api.cdn import CloudFrontBackend
+from api.models import Product, ProductImage
+from api.tests.helpers import MediaRootMixin, RecordingBackend, jpeg
+
+
+@override_settings(API_CDN_BACKEND="api.tests.helpers.RecordingBackend")
+class InvalidationTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        RecordingBackend.sent.clear()
+        self.product = Product.objects.create(name="Lake Bench")
+        self.images = ProductImage.objects.bulk_create(
+            [ProductImage(product=self.product, image=f"{i}.jpg", order=i) for i in range(50)]
+        )
+
+    def test_replaced_files_are_invalidated_in_one_batch(self):
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            for image in self.images:
+                image.image = jpeg(f"{image.order}.jpg", (40, 30))
+                image.save()
+            self.assertEqual(RecordingBackend.sent, [])
+
+        self.assertEqual(RecordingBackend.sent, [sorted(f"/{i}.jpg" for i in range(50))])
+
+    def test_new_files_and_caption_edits_are_not_invalidated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=self.product, image=jpeg("new.jpg", (40, 30)), order=50)
+            self.images[0].caption = "walnut"
+            self.images[0].save()
+
+        self.assertEqual(RecordingBackend.sent, [])
+
+    def test_flush_dedupes_and_splits_paths(self):
+        cdn.flush([f"{i}.jpg" for i in range(3001)] + ["0.jpg", ""])
+        self.assertEqual([len(batch) for batch in RecordingBackend.sent], [3000, 1])
+
+
+@override_settings(AWS_ACCESS_KEY_ID="key", AWS_SECRET_ACCESS_KEY="secret", CLOUDFLARE_DISTRIBUTION_ID="E123")
+class CloudFrontBackendTestCase(TestCase):
+
+    def test_client_is_created_once(self):
+        self.addCleanup(setattr, CloudFrontBackend, "_client", None)
+        with mock.patch.object(cdn.boto3, "client") as client:
+            CloudFrontBackend().invalidate(["/a.jpg"])
+            CloudFrontBackend().invalidate(["/b.jpg", "/c.jpg"])
+
+        client.assert_called_once()
+        self.assertEqual(client.return_value.create_invalidation.call_count, 2)
+        batch = client.return_value.create_invalidation.call_args.kwargs["InvalidationBatch"]
+        self.assertEqual(batch["Paths"], {"Quantity": 2, "Items": ["/b.jpg", "/c.jpg"]})
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api import derivatives
+from api.catalog import PRODUCT
+from api.models import CONTENT_HASH_NAME, Product, ProductImage, PublishedPayload
+from api.tests.helpers import MediaRootMixin, RecordingBackend, image_bytes
+
+
+@override_settings(API_CDN_BACKEND="api.tests.helpers.RecordingBackend")
+class ContentHashNamesTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        RecordingBackend.sent.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+
+    def body(self):
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        return json.loads(bytes(payload.content))
+
+    @override_settings(API_CONTENT_HASH_NAMES=True)
+    def test_uploads_are_named_by_content(self):
+        content = image_bytes()
+        with self.captureOnCommitCallbacks(execute=True):
+            first = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("A.JPG", content), order=0
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            second = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("b.jpg", content), order=1
+            )
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, hashlib.sha256(content).hexdigest() + ".jpg")
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertRegex(first.thumbnail.name, CONTENT_HASH_NAME)
+        self.assertEqual(second.thumbnail.name, first.thumbnail.name)
+        self.assertEqual(second.variants, first.variants)
+        # The same bytes are stored once, under one name.
+        stored = {first.image.name, first.thumbnail.name, *derivatives.names(first.variants)}
+        self.assertEqual(set(os.listdir(self.media_root)), stored)
+        self.assertTrue(all(CONTENT_HASH_NAME.search(name) for name in stored))
+        self.assertEqual([image["image"] for image in self.body()["images"]], [first.image.name] * 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.image = SimpleUploadedFile("a.jpg", image_bytes(color="black"))
+            first.save()
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(RecordingBackend.sent, [])
+
+    def test_rename_images_by_hash(self):
+        content = image_bytes()
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("bench.jpg", content), order=0
+            )
+        image.refresh_from_db()
+        self.assertEqual((image.image.name, image.thumbnail.name), ("bench.jpg", "bench-thumb.jpg"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rename_images_by_hash", "--delete-old", stdout=StringIO(), stderr=StringIO())
+
+        image.refresh_from_db()
+        self.assertEqual(image.image.name, hashlib.sha256(content).hexdigest() + ".jpg")
+        self.assertRegex(image.thumbnail.name, CONTENT_HASH_NAME)
+        self.assertEqual(image.image.read(), content)
+        stored = {image.image.name, image.thumbnail.name, *derivatives.names(image.variants)}
+        self.assertEqual(set(os.listdir(self.media_root)), stored)
+        self.assertTrue(all(CONTENT_HASH_NAME.search(name) for name in stored))
+        self.assertEqual(self.body()["images"][0]["image"], image.image.name)
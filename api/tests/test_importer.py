@@ -0,0 +1,106 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.catalog import MENU_LIST, PRODUCT
+from api.models import MenuList, MenuListItem, Product, ProductImage, PublishedPayload
+
+PRODUCTS = [
+    {
+        "kind": "product",
+        "name": f"Lake Bench {i}",
+        "meta": {"wood": "oak"},
+        "images": [{"image": f"bench-{i}-{j}.jpg", "order": j} for j in range(5)],
+    }
+    for i in range(10)
+]
+MENU_LIST_LINE = {
+    "kind": "menulist",
+    "name": "Benches",
+    "records": [
+        {"name": f"Lake Bench {i}", "image": f"bench-{i}-0.jpg", "url": f"/product/lake-bench-{i}", "order": i}
+        for i in range(10)
+    ],
+}
+
+
+def ndjson(*items):
+    return "\n".join(json.dumps(item) for item in items).encode()
+
+
+class ImportTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+    def post(self, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/_import/", content, content_type="application/x-ndjson")
+
+    def test_import_creates_and_publishes_everything(self):
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                "/api/_import/", ndjson(*PRODUCTS, MENU_LIST_LINE), content_type="application/x-ndjson"
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"products": 10, "menu_lists": 1, "images": 50, "records": 10})
+        self.assertEqual(Product.objects.get(slug="lake-bench-3").images.count(), 5)
+        self.assertEqual(MenuListItem.objects.filter(menu_list__slug="benches").count(), 10)
+        self.assertFalse(any(image.thumbnail for image in ProductImage.objects.all()))
+
+    def test_record_named_import_is_readable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Import", blurb="walnut")
+        self.assertEqual(self.client.get("/api/import").json()["body"]["blurb"], "walnut")
+
+    def test_import_publishes_payloads_on_commit(self):
+        self.post(ndjson(PRODUCTS[0], MENU_LIST_LINE))
+        self.assertEqual(PublishedPayload.objects.filter(kind=PRODUCT).count(), 1)
+        self.assertEqual(self.client.get("/api/benches").json()["body"]["records"][0]["image"], "bench-0-0.jpg")
+        self.assertEqual(PublishedPayload.objects.filter(kind=MENU_LIST).count(), 1)
+
+    def test_any_invalid_line_rejects_the_whole_import(self):
+        MenuList.objects.create(name="Chairs")
+        lines = (
+            ndjson(
+                PRODUCTS[0],
+                {**PRODUCTS[1], "images": [{"order": 0}]},
+                {**PRODUCTS[2], "name": "lake bench 0"},
+                {"kind": "menulist", "name": "Chairs"},
+                {"kind": "lamp", "name": "Lamp"},
+            )
+            + b"\nnot json"
+        )
+
+        response = self.post(lines)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["line"] for error in response.json()], [2, 3, 4, 5, 6])
+        self.assertFalse(Product.objects.exists())
+
+    def test_command_imports_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+            file.write(ndjson(*PRODUCTS[:2]))
+            file.flush()
+            out = StringIO()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("import_catalog", file.name, stdout=out)
+
+        self.assertIn("2 products", out.getvalue())
+        self.assertEqual(ProductImage.objects.count(), 10)
+
+    def test_command_reports_errors(self):
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+            file.write(ndjson({"kind": "product"}))
+            file.flush()
+            with self.assertRaises(CommandError):
+                call_command("import_catalog", file.name, stdout=StringIO(), stderr=StringIO())
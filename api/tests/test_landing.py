@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.landing import get_image, get_pool, pick_for_hour
+from api.models import LandingPageImage
+from api.processing import image_processed
+
+
+class LandingPageImagesTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        LandingPageImage.objects.bulk_create(
+            [LandingPageImage(image=f"{i}.jpg", thumbnail=f"{i}-thumb.jpg") for i in range(5)]
+        )
+
+    def test_pick_without_queries(self):
+        for pk in get_pool():
+            get_image(pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/landing-page-images")
+        self.assertEqual([q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]], [])
+        self.assertIn(response.json()["body"]["image"], [f"{i}.jpg" for i in range(5)])
+
+    def test_hourly_pick_is_stable(self):
+        pool = get_pool()
+        ten = datetime(2024, 3, 1, 10, 5, tzinfo=timezone.utc)
+        self.assertEqual(pick_for_hour(pool, ten), pick_for_hour(pool, ten.replace(minute=55)))
+
+        response = self.client.get("/api/landing-page-images?mode=hourly")
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_pool_follows_changes(self):
+        get_pool()
+        with self.captureOnCommitCallbacks(execute=True):
+            LandingPageImage.objects.first().delete()
+        self.assertEqual(len(get_pool()), 4)
+
+    def test_change_reloads_only_that_image(self):
+        pool = get_pool()
+        for pk in pool:
+            get_image(pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            LandingPageImage.objects.filter(pk=pool[0]).update(thumbnail="new-thumb.jpg", processing_status="ready")
+            image_processed.send(sender=LandingPageImage, instance=LandingPageImage(pk=pool[0]))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_pool(), pool)
+            get_image(pool[1])
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(get_image(pool[0])["body"]["thumbnail"], "new-thumb.jpg")
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import DropDownMenu
+
+
+class DropDownMenuTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu = DropDownMenu.objects.create(data=[{"name": "SOFAS", "url": "/list/sofas", "children": []}])
+            DropDownMenu.objects.create(name="footer", data=[{"name": "ABOUT", "url": "/about", "children": []}])
+
+    def test_main_and_named_menus(self):
+        self.assertEqual(self.client.get("/api/drop-down-menu").json()["body"][0]["name"], "SOFAS")
+        self.assertEqual(self.client.get("/api/drop-down-menu/footer").json()["body"][0]["name"], "ABOUT")
+        self.assertEqual(self.client.get("/api/drop-down-menu/nothing").status_code, 404)
+
+    def test_served_from_cache_with_versioned_urls(self):
+        version = self.client.get("/api/drop-down-menu")["X-Menu-Version"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/drop-down-menu?v={version}")
+        self.assertEqual([q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]], [])
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertNotIn("immutable", self.client.get("/api/drop-down-menu")["Cache-Control"])
+
+    def test_admin_save_invalidates(self):
+        etag = self.client.get("/api/drop-down-menu")["ETag"]
+        self.assertEqual(self.client.get("/api/drop-down-menu", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu.data = [{"name": "TABLES", "url": "/list/tables", "children": []}]
+            self.menu.save()
+
+        response = self.client.get("/api/drop-down-menu", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["body"][0]["name"], "TABLES")
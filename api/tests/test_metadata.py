@@ -0,0 +1,95 @@
+import hashlib
+import json
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.catalog import PRODUCT
+from api.models import Product, ProductImage, PublishedPayload
+from api.serializers import MenuListSerializer
+from api.tests.helpers import MediaRootMixin, image_bytes
+
+
+class ImageMetadataTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+
+    def test_metadata_is_read_from_the_upload(self):
+        content = image_bytes((640, 480), format="PNG")
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("bench.png", content), order=0
+            )
+
+        image.refresh_from_db()
+        self.assertEqual(
+            (image.image_width, image.image_height, image.image_bytes, image.image_format, image.image_sha256),
+            (640, 480, len(content), "PNG", hashlib.sha256(content).hexdigest()),
+        )
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        body = json.loads(bytes(payload.content))
+        self.assertEqual((body["images"][0]["width"], body["images"][0]["height"]), (640, 480))
+
+    def test_replacing_a_record_image_stores_its_metadata(self):
+        def save(image, menu_list=None, **record):
+            record.update(name="Lake", image=SimpleUploadedFile("lake.png", image), url="/lake", order=0)
+            serializer = MenuListSerializer(menu_list, data={"name": "Tables", "records": [record]})
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            with self.captureOnCommitCallbacks(execute=True):
+                return serializer.save()
+
+        menu_list = save(image_bytes((100, 50), format="PNG"))
+        record = menu_list.MenuListItems.get()
+        content = image_bytes((640, 480), format="PNG")
+        save(content, menu_list, id=record.pk)
+
+        record.refresh_from_db()
+        self.assertEqual(
+            (record.image_width, record.image_height, record.image_bytes, record.image_sha256),
+            (640, 480, len(content), hashlib.sha256(content).hexdigest()),
+        )
+
+    def test_admin_reads_the_columns(self):
+        image = ProductImage(product=self.product, image="missing.png", image_width=640, image_height=480)
+        image.image_bytes = 2 * 1048576
+        admin = site._registry[ProductImage]
+        self.assertIn("640 x 480", admin.dimensions(image))
+        self.assertIn("2.0 mb", admin.image_file_size(image))
+        self.assertIsNone(admin.dimensions(ProductImage(product=self.product, image="missing.png")))
+
+    def test_backfill(self):
+        content = image_bytes((300, 200), format="PNG")
+        default_storage.save("old.png", ContentFile(content))
+        with self.captureOnCommitCallbacks(execute=True):
+            images = ProductImage.objects.bulk_create(
+                [
+                    ProductImage(product=self.product, image=name, order=i)
+                    for i, name in enumerate(["old.png", "x.png"])
+                ]
+            )
+            self.product.save()
+
+        etag = self.client.get("/api/lake-bench")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("backfill_image_metadata", "--workers", "2", stdout=StringIO(), stderr=StringIO())
+
+        old, gone = ProductImage.objects.filter(pk__in=[image.pk for image in images]).order_by("order")
+        self.assertEqual((old.image_width, old.image_height, old.image_bytes), (300, 200, len(content)))
+        self.assertIsNone(gone.image_bytes)
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        self.assertEqual(json.loads(bytes(payload.content))["images"][0]["width"], 300)
+        self.assertEqual(self.client.get("/api/lake-bench", HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from api.models import Product
+from api.parsers import FormData, NestedFormParser, NestedMultiPartParser
+from api.tests.helpers import MediaRootMixin, jpeg
+from api.uploads import HashingTemporaryFileUploadHandler
+
+
+class NestedParserTestCase(TestCase):
+
+    def parse(self, data):
+        request = RequestFactory().post("/api/create-product", data)
+        request.upload_handlers = [HashingTemporaryFileUploadHandler(request)]
+        request = Request(request, parsers=[NestedMultiPartParser(), NestedFormParser()])
+        return request.data, request.FILES
+
+    def test_indexed_keys_are_nested_in_index_order(self):
+        data, files = self.parse(
+            {
+                "name": "Lake Bench",
+                "images[7].order": "1",
+                "images[2].order": "0",
+                "images[2].image": jpeg("a.jpg", (40, 30)),
+                "images[7].caption": "walnut",
+                "catalog": SimpleUploadedFile("catalog.ndjson", b"{}"),
+            }
+        )
+
+        self.assertIsInstance(data, FormData)
+        self.assertEqual(data["name"], "Lake Bench")
+        self.assertEqual([image["order"] for image in data["images"]], ["0", "1"])
+        self.assertEqual(data["images"][1]["caption"], "walnut")
+        self.assertIsInstance(data["images"][0]["image"], TemporaryUploadedFile)
+        self.assertEqual(list(files), ["catalog"])
+
+    @override_settings(API_FORM_MAX_ITEMS=10)
+    def test_index_is_bounded(self):
+        with self.assertRaises(ParseError):
+            self.parse({"images[10].order": "0"})
+        self.assertEqual(len(self.parse({"images[9].order": "0"})[0]["images"]), 1)
+
+
+class CreateFromFormTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+    def test_create_product(self):
+        data = {
+            "name": "Lake Bench",
+            "meta": '{"wood": "oak"}',
+            "images[1].image": jpeg("b.jpg", (40, 30)),
+            "images[1].order": "1",
+            "images[0].image": jpeg("a.jpg", (40, 30)),
+            "images[0].order": "0",
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/create-product", data, format="multipart")
+
+        self.assertEqual(response.status_code, 201, response.content)
+        product = Product.objects.get(name="Lake Bench")
+        self.assertEqual(product.meta, {"wood": "oak"})
+        self.assertEqual([image.image.name for image in product.images.all()], ["a.jpg", "b.jpg"])
+
+    def test_create_product_without_images(self):
+        response = self.client.post("/api/create-product", {"name": "Lake Bench"}, format="multipart")
+        self.assertEqual(response.status_code, 201, response.content)
+
+    @override_settings(API_FORM_MAX_ITEMS=10)
+    def test_out_of_range_index_is_rejected(self):
+        data = {"name": "Tables", "records[100000].name": "t"}
+        response = self.client.post("/api/create-menulist", data, format="multipart")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,106 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.catalog import PRODUCT
+from api.models import MenuList, Product, ProductImage, PublishedPayload
+from api.payloads import find_inconsistencies, publish, rebuild_all
+
+
+class PublishedPayloadTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+    def test_save_publishes_payload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Lake Bench", blurb="walnut")
+            ProductImage.objects.bulk_create([ProductImage(product=product, image="a.jpg", order=1)])
+            product.save()
+
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=product.pk)
+        self.assertEqual(payload.slug, "lake-bench")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/lake-bench")
+        self.assertEqual(len([q for q in queries if "SAVEPOINT" not in q["sql"]]), 1)
+        self.assertEqual(response.content, b'{"body":' + bytes(payload.content) + b"}")
+        self.assertEqual(response.json()["body"]["images"][0]["image"], "a.jpg")
+
+    def test_delete_removes_payload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(name="Lake Bench")
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+        self.assertFalse(PublishedPayload.objects.exists())
+        self.assertEqual(self.client.get("/api/lake-bench").status_code, 404)
+
+    def test_menu_list_wins_over_published_product(self):
+        MenuList.objects.create(name="Lighting")
+        publish(PRODUCT, Product.objects.create(name="lighting", blurb="brass").pk)
+        self.assertEqual(list(PublishedPayload.objects.values_list("kind", flat=True)), [PRODUCT])
+
+        self.assertIn("records", self.client.get("/api/lighting").json()["body"])
+        self.assertIn("records", self.client.get("/api/_batch/?slugs=lighting").json()["body"]["lighting"])
+        self.assertEqual(PublishedPayload.objects.count(), 2)
+
+    def test_consistency_check_and_rebuild(self):
+        product = Product.objects.create(name="Lake Bench", blurb="walnut")
+        self.assertEqual(list(find_inconsistencies()), [(PRODUCT, product.pk, "missing")])
+
+        rebuild_all()
+        self.assertEqual(list(find_inconsistencies()), [])
+
+        Product.objects.filter(pk=product.pk).update(blurb="oak")
+        self.assertEqual(list(find_inconsistencies()), [(PRODUCT, product.pk, "stale content")])
+
+
+class BatchTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Lake Bench", blurb="walnut")
+            MenuList.objects.create(name="Benches")
+
+    def test_batch_read(self):
+        response = self.client.get("/api/_batch/?slugs=lake-bench,Benches,nothing-here")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()["body"]
+        self.assertEqual(list(body), ["lake-bench", "Benches", "nothing-here"])
+        self.assertEqual(body["lake-bench"]["blurb"], "walnut")
+        self.assertEqual(body["Benches"]["records"], [])
+        self.assertEqual(body["nothing-here"]["status"], 404)
+
+    def test_query_count_is_fixed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(10):
+                Product.objects.create(name=f"bench {i}")
+        slugs = ",".join(f"bench-{i}" for i in range(10))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f"/api/_batch/?slugs={slugs}")
+        self.assertEqual(len([q for q in queries if "SAVEPOINT" not in q["sql"]]), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/_batch/?slugs={slugs}", HTTP_IF_NONE_MATCH="nothing")
+        self.assertEqual(len([q for q in queries if "SAVEPOINT" not in q["sql"]]), 0)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(f"/api/_batch/?slugs={slugs}", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_requires_slugs(self):
+        self.assertEqual(self.client.get("/api/_batch/").status_code, 400)
+
+    def test_record_named_batch_is_readable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name="Batch", blurb="walnut")
+        self.assertEqual(self.client.get("/api/batch").json()["body"]["blurb"], "walnut")
@@ -0,0 +1,313 @@
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from api import derivatives, processing, stats
+from api.catalog import MENU_LIST, PRODUCT
+from api.models import IMAGES_PROCESSED, IMAGES_UNCHANGED, MenuListItem, Product, ProductImage, PublishedPayload
+from api.processing import process_image
+from api.serializers import MenuListSerializer
+from api.tests.helpers import MediaRootMixin, RecordingBackend, image_bytes, jpeg
+
+
+class ImageProcessingTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+
+    def body(self):
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        return json.loads(bytes(payload.content))
+
+    def test_thumbnail_is_made_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(product=self.product, image=jpeg(), order=0)
+            self.assertEqual(image.processing_status, ProductImage.PENDING)
+            self.assertFalse(image.thumbnail)
+
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProductImage.READY)
+        self.assertEqual(image.thumbnail.name, "bench-thumb.jpg")
+        self.assertEqual(Image.open(image.thumbnail).size, (300, 200))
+        self.assertEqual(self.body()["images"][0]["thumbnail"], "bench-thumb.jpg")
+
+    @override_settings(API_IMAGE_PROCESSING_INLINE=False)
+    def test_original_is_served_while_queued(self):
+        with mock.patch.object(processing, "get_redis_connection") as redis:
+            with self.captureOnCommitCallbacks(execute=True):
+                image = ProductImage.objects.create(product=self.product, image=jpeg(), order=0)
+
+        redis.return_value.lpush.assert_called_once_with(processing.QUEUE_KEY, f"productimage:{image.pk}")
+        self.assertEqual(self.body()["images"][0]["thumbnail"], "bench.jpg")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(process_image("productimage", image.pk))
+        self.assertFalse(process_image("productimage", image.pk))
+        self.assertEqual(self.body()["images"][0]["thumbnail"], "bench-thumb.jpg")
+
+    @override_settings(API_IMAGE_PROCESSING_INLINE=False)
+    def test_image_replaced_during_processing_stays_pending(self):
+        with mock.patch.object(processing, "get_redis_connection"):
+            image = ProductImage.objects.create(product=self.product, image=jpeg(), order=0)
+            make_thumbnail = ProductImage.make_thumbnail
+
+            def replace_image(instance, img):
+                ProductImage.objects.filter(pk=instance.pk).update(image="other.jpg", processing_status="pending")
+                return make_thumbnail(instance, img)
+
+            with mock.patch.object(ProductImage, "make_thumbnail", replace_image):
+                self.assertFalse(process_image("productimage", image.pk))
+
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProductImage.PENDING)
+
+    def test_unreadable_image_fails(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("broken.jpg", b"not an image"), order=0
+            )
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProductImage.FAILED)
+        self.assertEqual(image.served_thumbnail.name, "broken.jpg")
+
+    @override_settings(API_IMAGE_PROCESSING_INLINE=False, API_IMAGE_PROCESSING_TIMEOUT=600)
+    def test_requeue_leaves_images_another_worker_is_making(self):
+        with mock.patch.object(processing, "get_redis_connection") as redis:
+            running, stopped = ProductImage.objects.bulk_create(
+                [ProductImage(product=self.product, image=f"{i}.jpg", order=i) for i in range(2)]
+            )
+            ProductImage.objects.filter(pk=running.pk).update(
+                processing_status=ProductImage.PROCESSING, processing_started=timezone.now()
+            )
+            ProductImage.objects.filter(pk=stopped.pk).update(
+                processing_status=ProductImage.PROCESSING, processing_started=timezone.now() - timedelta(hours=1)
+            )
+            self.assertEqual(processing.requeue(), 1)
+
+        redis.return_value.lpush.assert_called_once_with(processing.QUEUE_KEY, f"productimage:{stopped.pk}")
+        running.refresh_from_db()
+        self.assertEqual(running.processing_status, ProductImage.PROCESSING)
+
+    @override_settings(API_CDN_BACKEND="api.tests.helpers.RecordingBackend")
+    def test_same_upload_again_is_not_reprocessed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(product=self.product, image=jpeg(), order=0)
+        image.refresh_from_db()
+        RecordingBackend.sent.clear()
+        stats.reset([IMAGES_PROCESSED, IMAGES_UNCHANGED])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = jpeg()
+            image.caption = "oak"
+            image.save()
+        image.refresh_from_db()
+        self.assertEqual((image.processing_status, image.thumbnail.name), (ProductImage.READY, "bench-thumb.jpg"))
+        self.assertEqual(RecordingBackend.sent, [])
+        counters = stats.snapshot([IMAGES_PROCESSED, IMAGES_UNCHANGED])
+        self.assertEqual(counters, {IMAGES_PROCESSED: 0, IMAGES_UNCHANGED: 1})
+
+        # Storage that overwrites, as S3 does: the thumbnail is only invalidated once the new one is stored.
+        def overwrite(storage, name, max_length=None):
+            if storage.exists(name):
+                storage.delete(name)
+            return name
+
+        stored = []
+        store_thumbnail = ProductImage.store_thumbnail
+
+        def record_store(instance, name, content):
+            stored.append(list(RecordingBackend.sent))
+            return store_thumbnail(instance, name, content)
+
+        with (
+            mock.patch.object(FileSystemStorage, "get_available_name", overwrite),
+            mock.patch.object(ProductImage, "store_thumbnail", record_store),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            image.image = jpeg(color="black")
+            image.save()
+        self.assertEqual(stored, [[["/bench.jpg"]]])
+        self.assertEqual(
+            RecordingBackend.sent,
+            [["/bench.jpg"], ["/bench-thumb.jpg", "/bench.jpg-480w.webp", "/bench.jpg-960w.webp"]],
+        )
+        self.assertEqual(stats.snapshot([IMAGES_PROCESSED])[IMAGES_PROCESSED], 1)
+
+    def test_formats_pillow_cannot_write_are_skipped(self):
+        Image.init()
+        derivatives.writable.cache_clear()
+        self.addCleanup(derivatives.writable.cache_clear)
+        with mock.patch.dict(Image.SAVE):
+            del Image.SAVE["WEBP"]
+            with self.assertLogs("watchtower", "WARNING") as logs:
+                self.assertEqual(derivatives.writable(("webp", "jpeg")), ("jpeg",))
+            self.assertIn("can't write webp", logs.output[0])
+            with self.assertNoLogs("watchtower", "WARNING"):
+                derivatives.writable(("webp", "jpeg"))
+
+    @override_settings(
+        API_IMAGE_DERIVATIVE_WIDTHS=[480, 960, 1600], API_IMAGE_DERIVATIVE_FORMATS=["avif", "webp", "jpeg"]
+    )
+    def test_variants_are_made_for_smaller_widths(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(product=self.product, image=jpeg(), order=0)
+        image.refresh_from_db()
+
+        formats = [name for name in ["avif", "webp", "jpeg"] if name in {name for name, _ in derivatives.spec([480])}]
+        self.assertIn("jpeg", formats)
+        self.assertEqual(list(image.variants), formats)
+        self.assertEqual(image.variants["webp"], {"480": "bench.jpg-480w.webp", "960": "bench.jpg-960w.webp"})
+        self.assertNotEqual(derivatives.variant_name("bench.png", "webp", 480), image.variants["webp"]["480"])
+        with image.image.storage.open(image.variants["jpeg"]["480"]) as stored:
+            self.assertEqual(Image.open(stored).size, (480, 320))
+        self.assertEqual(self.body()["images"][0]["variants"], image.variants)
+
+        # Nothing is left to make, so running again stores nothing.
+        with image.open_image() as img, mock.patch.object(derivatives, "store") as store:
+            todo = derivatives.missing(image.variants, img.width, image.variant_widths())
+            made = derivatives.make_variants(image.image, img, image.variants, todo)
+        self.assertEqual((todo, made), ([], (image.variants, [])))
+        store.assert_not_called()
+
+    @override_settings(API_IMAGE_DERIVATIVE_WIDTHS=[480], API_IMAGE_DERIVATIVE_FORMATS=["jpeg"])
+    def test_large_jpegs_are_decoded_at_a_reduced_scale(self):
+        with self.assertLogs("watchtower", "INFO") as logs, self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(product=self.product, image=jpeg(size=(4000, 2000)), order=0)
+        image.refresh_from_db()
+
+        # 1/8 scale is the smallest that is still at least 480px wide.
+        self.assertIn("decoded 500x250 of 4000x2000, 0.5 MB of pixels", logs.output[-1])
+        self.assertEqual((image.image_width, image.image_height), (4000, 2000))
+        with image.image.storage.open(image.variants["jpeg"]["480"]) as stored:
+            self.assertEqual(Image.open(stored).size, (480, 240))
+        with image.thumbnail.open() as stored:
+            self.assertEqual(Image.open(stored).size, (300, 150))
+
+    @override_settings(API_IMAGE_MAX_PIXELS=500 * 500, API_IMAGE_DERIVATIVE_WIDTHS=[480])
+    def test_images_over_the_pixel_cap_fail(self):
+        png = image_bytes((1000, 600), format="PNG")
+        with self.assertLogs("watchtower", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            image = ProductImage.objects.create(
+                product=self.product, image=SimpleUploadedFile("bench.png", png), order=0
+            )
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProductImage.FAILED)
+
+        # A JPEG that scales down enough as it decodes is let through.
+        with self.captureOnCommitCallbacks(execute=True):
+            image.image = jpeg(size=(1000, 600))
+            image.save()
+        image.refresh_from_db()
+        self.assertEqual(image.processing_status, ProductImage.READY)
+
+
+@override_settings(API_MENU_TILE_WIDTHS=[240, 480], API_IMAGE_DERIVATIVE_FORMATS=["webp"])
+class MenuListItemProcessingTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def save(self, data, instance=None):
+        serializer = MenuListSerializer(instance, data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            return serializer.save()
+
+    def records(self, menu_list):
+        payload = PublishedPayload.objects.get(kind=MENU_LIST, object_id=menu_list.pk)
+        return json.loads(bytes(payload.content))["records"]
+
+    def test_records_get_a_thumbnail_and_tiles(self):
+        menu_list = self.save(
+            {
+                "name": "Tables",
+                "records": [
+                    {"name": "Lake Table", "image": jpeg("Lake.jpg", (800, 600)), "url": "/product/lake", "order": 0},
+                    {"name": "Drulo Table", "image": jpeg("drulo.jpg", (400, 300)), "url": "/drulo", "order": 1},
+                ],
+            }
+        )
+
+        lake, drulo = menu_list.MenuListItems.all()
+        self.assertEqual((lake.processing_status, lake.thumbnail.name), (MenuListItem.READY, "lake-thumb.jpg"))
+        self.assertEqual(lake.variants, {"webp": {"240": "lake.jpg-240w.webp", "480": "lake.jpg-480w.webp"}})
+        self.assertEqual(drulo.variants, {"webp": {"240": "drulo.jpg-240w.webp"}})
+        self.assertEqual(
+            [(record["thumbnail"], record["variants"]) for record in self.records(menu_list)],
+            [(lake.thumbnail.name, lake.variants), (drulo.thumbnail.name, drulo.variants)],
+        )
+
+        # Replacing an image remakes its tiles; the other record is left alone.
+        records = [
+            {"id": lake.pk, "name": "Lake Table", "image": jpeg("lake.jpg", (300, 200)), "url": lake.url, "order": 0},
+            {"id": drulo.pk, "name": "Drulo Table", "url": drulo.url, "order": 1},
+        ]
+        with mock.patch.object(processing, "process_image", wraps=process_image) as process:
+            self.save({"name": "Tables", "records": records}, menu_list)
+        process.assert_called_once_with("menulistitem", lake.pk)
+        lake.refresh_from_db()
+        self.assertEqual(list(lake.variants["webp"]), ["240"])
+        self.assertEqual(self.records(menu_list)[0]["variants"], lake.variants)
+
+
+@override_settings(API_IMAGE_DERIVATIVE_WIDTHS=[480], API_IMAGE_DERIVATIVE_FORMATS=["webp"])
+class BackfillDerivativesTestCase(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.checkpoint = os.path.join(self.media_root, "checkpoint.json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+            self.images = [
+                ProductImage.objects.create(product=self.product, image=jpeg(f"bench-{i}.jpg"), order=i)
+                for i in range(2)
+            ]
+
+    def backfill(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "backfill_derivatives", "--processes", "1", "--checkpoint", self.checkpoint, *args, stdout=out
+            )
+        return out.getvalue()
+
+    @override_settings(API_IMAGE_DERIVATIVE_WIDTHS=[960])
+    def test_variants_follow_the_spec(self):
+        out = self.backfill()
+
+        self.assertIn("Remade the derivatives of 2 images, 0 failed", out)
+        first, second = ProductImage.objects.order_by("order")
+        self.assertEqual(first.variants, {"webp": {"960": "bench-0.jpg-960w.webp"}})
+        with first.image.storage.open(first.variants["webp"]["960"]) as stored:
+            self.assertEqual(Image.open(stored).size, (960, 640))
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        self.assertEqual(json.loads(bytes(payload.content))["images"][1]["variants"], second.variants)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        # Once they match, a second run has nothing to make.
+        self.assertIn("Remade the derivatives of 0 images", self.backfill())
+
+    def test_resumes_after_the_checkpoint(self):
+        with open(self.checkpoint, "w") as file:
+            json.dump({"productimage": self.images[0].pk}, file)
+
+        self.backfill("--thumbnails", "--models", "productimage")
+
+        first, second = ProductImage.objects.order_by("order")
+        self.assertEqual(first.thumbnail.name, "bench-0-thumb.jpg")
+        self.assertNotEqual(second.thumbnail.name, "bench-1-thumb.jpg")
@@ -0,0 +1,51 @@
+import datetime
+import decimal
+import json
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.catalog import PRODUCT, read_queryset
+from api.models import Product, ProductImage
+from api.payloads import render_body
+from api.renderers import FastJSONRenderer, PreEncoded
+
+DATA = {
+    "id": 7,
+    "name": "Captain’s Chair  ",
+    "price": decimal.Decimal("12.50"),
+    "updated_on": datetime.datetime(2024, 3, 1, 12, 30, tzinfo=datetime.timezone.utc),
+    "meta": {"tags": ["oak", None, 1.5, True]},
+    "records": [{"id": i, "image": f"{i}.jpg", "order": i} for i in range(3)],
+}
+
+
+class FastJSONRendererTestCase(TestCase):
+
+    def test_matches_drf_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_matches_drf_json_renderer_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_pre_encoded_values_are_copied(self):
+        data = {"body": {"a": PreEncoded(b'{"x":[1,2]}'), "b": {"error": "missing"}}, "c": PreEncoded(b"null")}
+        expected = b'{"body":{"a":{"x":[1,2]},"b":{"error":"missing"}},"c":null}'
+        self.assertEqual(FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_indented_output_decodes_pre_encoded_values(self):
+        content = FastJSONRenderer().render({"body": PreEncoded(b'{"x":1}')}, "application/json; indent=2", {})
+        self.assertEqual(content, JSONRenderer().render({"body": {"x": 1}}, "application/json; indent=2", {}))
+
+    def test_render_body_copies_stored_meta(self):
+        product = Product.objects.create(name="Lake Bench", meta={"wood": "walnut", "sizes": [60, 72]})
+        ProductImage.objects.bulk_create([ProductImage(product=product, image=f"{i}.jpg", order=i) for i in range(3)])
+        with self.assertNumQueries(2):
+            body = json.loads(render_body(read_queryset(PRODUCT).get(pk=product.pk)))
+        self.assertEqual(body["meta"], {"wood": "walnut", "sizes": [60, 72]})
+        self.assertEqual([image["order"] for image in body["images"]], [0, 1, 2])
@@ -0,0 +1,199 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.catalog import MENU_LIST, PRODUCT
+from api.models import MenuList, MenuListItem, Product, ProductImage, PublishedPayload
+from api.serializers import MenuListSerializer, ProductSerializer, ReorderSerializer
+
+
+class ProductImageReconcileTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+            self.images = ProductImage.objects.bulk_create(
+                [ProductImage(product=self.product, image=f"{i}.jpg", order=i, caption=f"view {i}") for i in range(30)]
+            )
+
+    def update(self, images):
+        serializer = ProductSerializer(self.product, data={"name": "Lake Bench", "images": images})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        return serializer
+
+    def test_caption_and_order_edits_skip_image_processing(self):
+        images = [{"id": image.pk, "order": image.order, "caption": image.caption} for image in self.images]
+        images[3]["caption"] = "walnut top"
+        images[0]["order"], images[1]["order"] = 1, 0
+
+        with mock.patch.object(ProductImage, "save") as save, CaptureQueriesContext(connection) as queries:
+            self.update(images[:-1])
+
+        save.assert_not_called()
+        writes = ('UPDATE "api_productimage"', 'INSERT INTO "api_productimage"', 'DELETE FROM "api_productimage"')
+        self.assertEqual([q["sql"][:6] for q in queries if q["sql"].startswith(writes)], ["UPDATE", "DELETE"])
+        rows = {image.pk: image for image in self.product.images.all()}
+        self.assertEqual(len(rows), 29)
+        self.assertNotIn(self.images[-1].pk, rows)
+        self.assertEqual(rows[self.images[3].pk].caption, "walnut top")
+        self.assertEqual([rows[self.images[0].pk].order, rows[self.images[1].pk].order], [1, 0])
+        self.assertGreater(rows[self.images[3].pk].updated_on, self.images[3].updated_on)
+        self.assertEqual(rows[self.images[5].pk].updated_on, self.images[5].updated_on)
+
+        payload = PublishedPayload.objects.get(kind=PRODUCT, object_id=self.product.pk)
+        self.assertIn(b"walnut top", bytes(payload.content))
+
+    def test_images_of_other_products_are_rejected(self):
+        other = Product.objects.create(name="Lake Chair")
+        image = ProductImage.objects.bulk_create([ProductImage(product=other, image="x.jpg", order=0)])[0]
+        data = {"name": "Lake Bench", "images": [{"id": image.pk, "order": 0}]}
+        serializer = ProductSerializer(self.product, data=data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("images", serializer.errors)
+
+    def test_new_images_need_a_file(self):
+        serializer = ProductSerializer(self.product, data={"name": "Lake Bench", "images": [{"order": 0}]})
+        self.assertFalse(serializer.is_valid())
+
+
+class MenuListRecordUpsertTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_list = MenuList.objects.create(name="Benches")
+            self.records = MenuListItem.objects.bulk_create(
+                [
+                    MenuListItem(menu_list=self.menu_list, name=f"bench {i}", image=f"{i}.jpg", url=f"/b-{i}", order=i)
+                    for i in range(60)
+                ]
+            )
+
+    def update(self, records):
+        """
+        Save the records and return the SQL of the save itself, leaving out savepoints and the
+        republish that runs on commit.
+        """
+        serializer = MenuListSerializer(self.menu_list, data={"name": "Benches", "records": records})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        return [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+
+    def test_reordering_is_one_bulk_update(self):
+        records = [
+            {"id": record.pk, "name": record.name, "url": record.url, "order": 59 - record.order}
+            for record in self.records
+        ]
+        with mock.patch.object(MenuListItem, "save") as save:
+            queries = self.update(records)
+
+        save.assert_not_called()
+        # Save the menu list, load its records, then update all 60 at once.
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(queries[2].startswith('UPDATE "api_menulistitem"'))
+        orders = list(self.menu_list.MenuListItems.order_by("order").values_list("name", flat=True))
+        self.assertEqual(orders[0], "bench 59")
+
+        payload = PublishedPayload.objects.get(kind=MENU_LIST, object_id=self.menu_list.pk)
+        self.assertEqual(json.loads(bytes(payload.content))["records"][0]["name"], "bench 59")
+
+    def test_unchanged_records_are_not_written(self):
+        records = [{"id": r.pk, "name": r.name, "url": r.url, "order": r.order} for r in self.records]
+        records[10]["name"] = "long bench"
+        queries = self.update(records[:-1])
+        writes = [sql for sql in queries if sql.startswith(('UPDATE "api_menulistitem"', "INSERT", "DELETE"))]
+        self.assertEqual(len(writes), 2)
+
+        self.assertEqual(self.menu_list.MenuListItems.count(), 59)
+        self.assertEqual(self.menu_list.MenuListItems.get(pk=self.records[10].pk).name, "long bench")
+
+    def test_records_key_is_applied(self):
+        self.update([{"id": self.records[0].pk, "name": "only bench", "url": "/product/only", "order": 0}])
+        self.assertEqual(list(self.menu_list.MenuListItems.values_list("name", flat=True)), ["only bench"])
+
+
+class ReorderTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(name="Lake Bench")
+            self.images = ProductImage.objects.bulk_create(
+                [ProductImage(product=self.product, image=f"{i}.jpg", order=i) for i in range(20)]
+            )
+            self.menu_list = MenuList.objects.create(name="Tables")
+            self.records = MenuListItem.objects.bulk_create(
+                [
+                    MenuListItem(menu_list=self.menu_list, name=f"t{i}", image=f"t{i}.jpg", url="/", order=i)
+                    for i in range(3)
+                ]
+            )
+        # Published, and cached by this read.
+        self.client.get("/api/lake-bench")
+
+    def reorder(self, slug, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(f"/api/{slug}/order", {"ids": ids}, format="json")
+
+    def test_images_are_reordered_in_one_update(self):
+        ids = [image.pk for image in self.images]
+        ids[0], ids[1] = ids[1], ids[0]
+
+        with mock.patch.object(ProductImage, "save") as save, CaptureQueriesContext(connection) as queries:
+            response = self.reorder("lake-bench", ids)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"ids": ids, "moved": 2})
+        save.assert_not_called()
+        updates = [q for q in queries if q["sql"].startswith('UPDATE "api_productimage"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(self.product.images.values_list("pk", flat=True)), ids)
+        body = self.client.get("/api/lake-bench").json()["body"]
+        self.assertEqual([image["id"] for image in body["images"]], ids)
+
+    def test_records_are_reordered(self):
+        ids = [record.pk for record in reversed(self.records)]
+        self.assertEqual(self.reorder("tables", ids).json()["moved"], 2)
+        payload = PublishedPayload.objects.get(kind=MENU_LIST, object_id=self.menu_list.pk)
+        self.assertEqual([record["id"] for record in json.loads(bytes(payload.content))["records"]], ids)
+
+    def test_unchanged_order_writes_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reorder("tables", [record.pk for record in self.records])
+        self.assertEqual(response.json()["moved"], 0)
+        self.assertFalse([q for q in queries if q["sql"].startswith(("UPDATE", "INSERT"))])
+
+    def test_ids_must_match_the_rows(self):
+        ids = [record.pk for record in self.records]
+        for bad in [ids[:-1], ids + [ids[0]], ids[:-1] + [self.images[0].pk], []]:
+            self.assertEqual(self.reorder("tables", bad).status_code, 400)
+        self.assertEqual(self.reorder("no-such-thing", ids).status_code, 404)
+
+    def test_rows_added_after_validation_are_a_conflict(self):
+        ids = [record.pk for record in reversed(self.records)]
+        validate_ids = ReorderSerializer.validate_ids
+
+        def insert_after_validating(serializer, value):
+            value = validate_ids(serializer, value)
+            MenuListItem.objects.create(menu_list=self.menu_list, name="t3", image="t3.jpg", url="/", order=3)
+            return value
+
+        with mock.patch.object(ReorderSerializer, "validate_ids", insert_after_validating):
+            response = self.reorder("tables", ids)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("were added", response.json()["ids"][0])
+        orders = dict(self.menu_list.MenuListItems.values_list("pk", "order"))
+        self.assertEqual([orders[record.pk] for record in self.records], [0, 1, 2])
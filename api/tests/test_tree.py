@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import MenuList, MenuListItem, Product
+
+
+class CatalogTreeTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(email="test@bddw.com"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            catalog = MenuList.objects.create(name="Catalog")
+            benches = MenuList.objects.create(name="Benches")
+            Product.objects.create(name="Lake Bench")
+            MenuListItem.objects.bulk_create(
+                [
+                    MenuListItem(menu_list=catalog, name="benches", image="a.jpg", url="/list/benches", order=1),
+                    MenuListItem(menu_list=catalog, name="shop", image="b.jpg", url="https://shop.bddw.com", order=2),
+                    MenuListItem(menu_list=benches, name="lake", image="c.jpg", url="/product/lake-bench", order=1),
+                    MenuListItem(menu_list=benches, name="gone", image="d.jpg", url="/product/gone", order=2),
+                    MenuListItem(menu_list=benches, name="back", image="e.jpg", url="/list/catalog", order=3),
+                ]
+            )
+            catalog.save()
+            benches.save()
+
+    def test_tree(self):
+        response = self.client.get("/api/_tree/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()["body"]
+
+        self.assertEqual(list(body["nodes"]), ["catalog", "benches", "lake-bench"])
+        self.assertEqual(body["nodes"]["catalog"]["children"], ["benches"])
+        self.assertEqual(body["nodes"]["benches"]["children"], ["lake-bench", "gone", "catalog"])
+        self.assertEqual(body["nodes"]["lake-bench"]["kind"], "product")
+        self.assertEqual(body["missing"], ["gone"])
+        self.assertEqual(body["cycles"], [["benches", "catalog"]])
+
+    def test_depth_limit(self):
+        body = self.client.get("/api/_tree/?root=catalog&depth=1").json()["body"]
+        self.assertEqual(list(body["nodes"]), ["catalog", "benches"])
+
+    def test_cached_until_content_changes(self):
+        etag = self.client.get("/api/_tree/")["ETag"]
+        self.assertEqual(self.client.get("/api/_tree/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(slug="lake-bench")
+            product.blurb = "walnut"
+            product.save()
+
+        response = self.client.get("/api/_tree/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["body"]["nodes"]["lake-bench"]["body"]["blurb"], "walnut")
+
+    def test_missing_root(self):
+        self.assertEqual(self.client.get("/api/_tree/?root=nothing-here").status_code, 404)
+
+    def test_record_named_tree_is_readable(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuList.objects.create(name="Tree")
+        self.assertEqual(self.client.get("/api/tree").json()["body"]["records"], [])
@@ -0,0 +1,22 @@
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import RequestFactory, TestCase
+
+from api.uploads import HashingTemporaryFileUploadHandler
+
+
+class HashingUploadHandlerTestCase(TestCase):
+
+    def test_small_uploads_are_spooled_to_disk_and_hashed(self):
+        content = b"\xff\xd8" + bytes(range(256)) * 4000
+        data = {"images[0].image": SimpleUploadedFile("a.jpg", content)}
+        request = RequestFactory().post("/api/create-product", data)
+        request.upload_handlers = [HashingTemporaryFileUploadHandler(request)]
+
+        upload = request.FILES["images[0].image"]
+
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertEqual(upload.sha256, hashlib.sha256(content).hexdigest())
+        with open(upload.temporary_file_path(), "rb") as spooled:
+            self.assertEqual(spooled.read(), content)
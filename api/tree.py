@@ -0,0 +1,97 @@
+import json
+
+from django.core.cache import cache
+
+from .cache import tree_cache_key
+from .catalog import MENU_LIST, normalize_slug, slug_from_url
+from .conditional import make_etag
+from .payloads import load_entries
+from .renderers import PreEncoded, render_json
+
+
+def _is_ancestor(slug, node, parents):
+    while node is not None:
+        if node == slug:
+            return True
+        node = parents[node]
+    return False
+
+
+def walk_catalog(root, max_depth):
+    """
+    Breadth-first walk of the catalog from ``root``, following each menu list record's url the way
+    the site does. Every level is loaded with one ``load_entries`` call, so the cost grows with the
+    depth of the catalog rather than its size.
+
+    Returns ``(nodes, missing, cycles)``: ``nodes`` maps each reached slug to its cache entry and
+    child slugs, ``missing`` lists linked slugs that match no record and ``cycles`` lists the
+    ``[from, to]`` links that lead back to one of their own ancestors. Nodes at ``max_depth`` are
+    loaded but not expanded.
+    """
+    nodes, missing, cycles = {}, [], []
+    parents = {root: None}
+    level, depth = [root], 0
+
+    while level:
+        entries = load_entries(level)
+        next_level = []
+        for slug in level:
+            entry = entries.get(slug)
+            if entry is None:
+                missing.append(slug)
+                continue
+
+            children = []
+            if entry["kind"] == MENU_LIST:
+                for record in json.loads(entry["content"])["records"]:
+                    child = slug_from_url(record["url"])
+                    if child is not None and child not in children:
+                        children.append(child)
+            nodes[slug] = entry, children
+
+            if depth == max_depth:
+                continue
+            for child in children:
+                if child not in parents:
+                    parents[child] = slug
+                    next_level.append(child)
+                elif _is_ancestor(child, slug, parents):
+                    cycles.append([slug, child])
+        level, depth = next_level, depth + 1
+
+    return nodes, missing, cycles
+
+
+def render_tree(root, max_depth):
+    """
+    The cacheable ``{"content", "etag", "found"}`` of the tree below ``root``. Node bodies go to the
+    renderer as the stored JSON bytes rather than being decoded and encoded again.
+    """
+    nodes, missing, cycles = walk_catalog(root, max_depth)
+    content = render_json(
+        {
+            "root": root,
+            "depth": max_depth,
+            "nodes": {
+                slug: {"kind": entry["kind"], "children": children, "body": PreEncoded(entry["content"])}
+                for slug, (entry, children) in nodes.items()
+            },
+            "missing": missing,
+            "cycles": cycles,
+        }
+    )
+    etag = make_etag("tree", root, max_depth, [(slug, entry["etag"]) for slug, (entry, _) in nodes.items()], missing)
+    return {"content": content, "etag": etag, "found": root in nodes}
+
+
+def get_tree(root, max_depth, timeout):
+    """
+    ``render_tree`` through the cache. Keys carry the catalog version, so any republish retires them.
+    """
+    root = normalize_slug(root)
+    key = tree_cache_key(root, max_depth)
+    tree = cache.get(key)
+    if tree is None:
+        tree = render_tree(root, max_depth)
+        cache.set(key, tree, timeout=timeout)
+    return tree
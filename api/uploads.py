@@ -0,0 +1,29 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spools every upload to a temporary file on disk in fixed-size chunks, however small it is,
+    and computes its SHA-256 on the way so nothing has to read the file again for it. The hex
+    digest is left on the uploaded file as ``sha256``.
+
+    Storage then streams from that file: S3 in multipart chunks (AWS_S3_TRANSFER_CONFIG) and
+    ImageField validation by path, so an upload is never held in worker memory as a whole.
+    """
+
+    chunk_size = 256 * 2**10
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
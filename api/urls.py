@@ -1,6 +1,16 @@
 from django.urls import path
 
-from .views import api_create_menulist, api_create_product, api_drop_down_menu, api_landing_page_images, api_response
+from .views import (
+    api_batch,
+    api_catalog_tree,
+    api_create_menulist,
+    api_create_product,
+    api_drop_down_menu,
+    api_import,
+    api_landing_page_images,
+    api_reorder,
+    api_response,
+)
 
 app_name = "api"
 
@@ -8,6 +18,12 @@ urlpatterns = [
     path("create-product", api_create_product, name="create-product"),  # create
     path("create-menulist", api_create_menulist, name="create-menulist"),  # create
     path("drop-down-menu", api_drop_down_menu, name="drop-down-menu"),
+    path("drop-down-menu/<slug:name>", api_drop_down_menu, name="named-drop-down-menu"),
     path("landing-page-images", api_landing_page_images, name="landing-page-images"),
+    # Ending in a slash, which <slug> never matches, so they leave every record slug readable.
+    path("_batch/", api_batch, name="batch"),  # read many
+    path("_tree/", api_catalog_tree, name="tree"),  # read everything below a menu list
+    path("_import/", api_import, name="import"),  # create many
+    path("<slug>/order", api_reorder, name="reorder"),  # update the order of images or records
     path("<slug>", api_response, name="api-endpoint"),  # upadate or read
 ]
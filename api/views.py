@@ -1,58 +1,56 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from rest_framework import status
-from rest_framework.decorators import api_view, parser_classes
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.decorators import api_view, parser_classes, renderer_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-import logging
 
-from .models import DropDownMenu, LandingPageImage, MenuList, Product
-from .serializers import DropDownMenuSerializer, LandingPageImageSerializer, MenuListSerializer, ProductSerializer
-####
-special_cases = {
-    "sev-drulo-series": "sev-drulo series",
-    "sev-drulo-sofa": "sev-drulo sofa",
-    "sev-drulo-club-chair": "sev-drulo club chair",
-    "sev-drulo-sectional-sofa": "sev-drulo sectional sofa",
-    "wall-mount-luggage-rack": "Wall-mount Luggage Rack",
-    "sev-drulo-ottoman": "sev-drulo ottoman",
-    "robe-tile-coffe-table": "robe-tile coffee table",
-}
+from .cache import get_cached_entry, set_cached_entry
+from .catalog import CATALOG_MODELS, get_catalog_instance, normalize_slug, resolve_slug
+from .conditional import make_etag, not_modified, set_validators
+from .importer import ImportFailed, import_catalog
+from .landing import get_image, get_pool, pick_for_hour, pick_random
+from .menus import DEFAULT_MENU, get_menu_entry
+from .models import MenuList
+from .parsers import NestedFormParser, NestedMultiPartParser
+from .payloads import as_entry, get_published, load_entries, publish, schedule_publish
+from .renderers import PreEncoded, api_renderer_classes
+from .serializers import LandingPageImageSerializer, MenuListSerializer, ProductSerializer, ReorderSerializer
+from .tree import get_tree
 
 logger = logging.getLogger('watchtower')
 
 @api_view(["GET", "PUT"])
-@parser_classes([MultiPartParser, FormParser])
+@renderer_classes(api_renderer_classes())
+@parser_classes([NestedMultiPartParser, NestedFormParser])
 def api_response(request, slug=None):
-    instance = None
-    serializer_class = None
-
     # Log the request method and slug
     logger.info(f"Received {request.method} request for slug: {slug}")
 
-    if slug not in special_cases.keys():
-        slug = slug.lower().replace("-", " ").replace("captains", "captain's").replace("admirals", "admiral's")
-    else:
-        slug = special_cases[slug]
+    slug = normalize_slug(slug)
 
-    try:
-        instance = MenuList.objects.get(name__iexact=slug)
+    if request.method == "GET":
+        return published_response(request, slug)
+
+    instance = get_catalog_instance(slug)
+
+    if instance is None:
+        logger.error(f"No matching MenuList or Product found for slug: {slug}")
+        return Response({"error": "No matching MenuList or Product found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if isinstance(instance, MenuList):
         serializer_class = MenuListSerializer
         logger.info(f"MenuList instance found for slug: {slug}")
-    except MenuList.DoesNotExist:
-        try:
-            instance = Product.objects.get(name__iexact=slug)
-            serializer_class = ProductSerializer
-            logger.info(f"Product instance found for slug: {slug}")
-        except Product.DoesNotExist:
-            logger.error(f"No matching MenuList or Product found for slug: {slug}")
-            return Response({"error": "No matching MenuList or Product found"}, status=status.HTTP_404_NOT_FOUND)
-
-    if request.method == "GET":
-        serializer = serializer_class(instance)
-        body_response = {"body": serializer.data}
-        logger.info(f"GET request successful for slug: {slug}, returning data")
-        return Response(body_response, status=status.HTTP_200_OK)
+    else:
+        serializer_class = ProductSerializer
+        logger.info(f"Product instance found for slug: {slug}")
 
-    elif request.method == "PUT":
+    if request.method == "PUT":
         serializer = serializer_class(instance, data=request.data)
         if serializer.is_valid():
             serializer.save()
@@ -64,31 +62,143 @@ def api_response(request, slug=None):
     logger.warning(f"Method {request.method} not allowed for slug: {slug}")
     return Response({"error": "Method not allowed"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
-@api_view(["POST"])
-@parser_classes([MultiPartParser, FormParser])
-def api_create_product(request):
-    # Extract and restructure images data if necessary
-    images_data = []
-    for key in request.data.keys():
-        if key.startswith("images["):
-            index, field = key.split("[")[1].split("].")
-            index = int(index)  # Convert index to integer
-
-            # Initialize a new dictionary or update existing
-            while index >= len(images_data):
-                images_data.append({})
-            images_data[index][field] = request.data[key]
-
-    # Include the images data in the request data
-    request_data = {
-        "name": request.data.get("name"),
-        "blurb": request.data.get("blurb"),
-        "meta": request.data.get("meta"),
-        "images": images_data,
+
+def published_response(request, slug):
+    """
+    Serve a GET from the cache, then the PublishedPayload table, publishing the record on first read.
+    The stored JSON bytes are passed to the renderer as they are, without touching the ORM or DRF serializers.
+    """
+    entry, version = get_cached_entry(slug)
+    cache_status = "HIT"
+
+    if entry is None:
+        cache_status = "MISS"
+        payload = get_published(slug)
+        if payload is None:
+            match = resolve_slug(slug)
+            payload = publish(*match) if match is not None else None
+        if payload is None:
+            logger.error(f"No matching MenuList or Product found for slug: {slug}")
+            return Response({"error": "No matching MenuList or Product found"}, status=status.HTTP_404_NOT_FOUND)
+        entry = as_entry(payload)
+        set_cached_entry(slug, version, entry)
+
+    response = not_modified(request, entry["etag"], entry["last_modified"])
+    if response is None:
+        response = Response({"body": PreEncoded(entry["content"])})
+        logger.info(f"GET request successful for slug: {slug}, returning data")
+    response["X-Cache"] = cache_status
+    return set_validators(response, entry["etag"], entry["last_modified"])
+
+
+@api_view(["PATCH"])
+@renderer_classes(api_renderer_classes())
+@parser_classes([JSONParser])
+def api_reorder(request, slug):
+    """
+    Reorder a product's images or a menu list's records without sending the whole record: the
+    body is ``{"ids": [...]}`` with every image or record id in its new order. Only the rows that
+    move are written, and only this record's payload is republished.
+    """
+    slug = normalize_slug(slug)
+    match = resolve_slug(slug)
+    if match is None:
+        logger.error(f"No matching MenuList or Product found for slug: {slug}")
+        return Response({"error": "No matching MenuList or Product found"}, status=status.HTTP_404_NOT_FOUND)
+
+    kind, pk = match
+    serializer = ReorderSerializer(CATALOG_MODELS[kind].objects.get(pk=pk), data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        with transaction.atomic():
+            serializer.save()
+            if serializer.moved:
+                schedule_publish(kind, pk)
+    except ValidationError as e:
+        return Response(e.detail, status=status.HTTP_409_CONFLICT)
+    logger.info(f"Reordered {serializer.moved} rows of {slug}")
+    return Response({"ids": serializer.validated_data["ids"], "moved": serializer.moved})
+
+
+@api_view(["GET"])
+@renderer_classes(api_renderer_classes())
+def api_batch(request):
+    """
+    Read many catalog slugs at once: ``GET /api/_batch/?slugs=a,b,c`` returns one body keyed by the
+    slugs as requested, with a 404 entry in place of any slug that matches nothing.
+    """
+    requested = [slug for slug in request.query_params.get("slugs", "").split(",") if slug]
+    if not requested:
+        return Response({"error": "Pass the slugs to read as ?slugs=a,b,c"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(requested) > settings.API_BATCH_MAX_SLUGS:
+        return Response(
+            {"error": f"At most {settings.API_BATCH_MAX_SLUGS} slugs can be read at once"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    canonical = {slug: normalize_slug(slug) for slug in dict.fromkeys(requested)}
+    entries = load_entries(set(canonical.values()))
+    logger.info(f"Batch GET request for {len(canonical)} slugs, {len(canonical) - len(entries)} not found")
+
+    found = [entries[slug] for slug in canonical.values() if slug in entries]
+    etag = make_etag("batch", list(canonical.items()), [entry["etag"] for entry in found])
+    last_modified = max([entry["last_modified"] for entry in found], default=0)
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    # Hand the stored JSON bytes to the renderer rather than decoding and re-encoding every body.
+    missing = {"error": "No matching MenuList or Product found", "status": 404}
+    body = {
+        slug: PreEncoded(entries[normalized]["content"]) if normalized in entries else missing
+        for slug, normalized in canonical.items()
     }
+    response = Response({"body": body})
+    return set_validators(response, etag, last_modified)
 
-    # Handle POST request
-    serializer = ProductSerializer(data=request_data)
+
+@api_view(["GET"])
+@renderer_classes(api_renderer_classes())
+def api_catalog_tree(request):
+    """
+    The whole catalog graph below ``?root=`` (default ``catalog``), resolved server side: every
+    reachable menu list and product keyed by slug with the slugs it links to, optionally cut off
+    at ``?depth=``. Links back to an ancestor are reported under ``cycles`` instead of followed.
+    """
+    root = request.query_params.get("root", "catalog")
+    try:
+        depth = int(request.query_params.get("depth", settings.API_TREE_MAX_DEPTH))
+    except ValueError:
+        return Response({"error": "depth must be a whole number"}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 <= depth <= settings.API_TREE_MAX_DEPTH:
+        return Response(
+            {"error": f"depth must be between 0 and {settings.API_TREE_MAX_DEPTH}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    tree = get_tree(root, depth, timeout=settings.API_CACHE_TIMEOUT)
+    if not tree["found"]:
+        logger.error(f"No matching MenuList or Product found for tree root: {root}")
+        return Response({"error": "No matching MenuList or Product found"}, status=status.HTTP_404_NOT_FOUND)
+
+    response = not_modified(request, tree["etag"])
+    if response is None:
+        response = Response({"body": PreEncoded(tree["content"])})
+    return set_validators(response, tree["etag"])
+
+
+@api_view(["POST"])
+@renderer_classes(api_renderer_classes())
+@parser_classes([NestedMultiPartParser, NestedFormParser])
+def api_create_product(request):
+    """
+    Create a product from a form with ``name``, ``blurb``, ``meta`` and ``images[<index>].<field>`` keys.
+    """
+    # A form can't send an empty list, so no images keys means no images.
+    data = request.data.copy()
+    data.setdefault("images", [])
+    serializer = ProductSerializer(data=data)
     if serializer.is_valid():
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -96,28 +206,15 @@ def api_create_product(request):
 
 
 @api_view(["POST"])
-@parser_classes([MultiPartParser, FormParser])
+@renderer_classes(api_renderer_classes())
+@parser_classes([NestedMultiPartParser, NestedFormParser])
 def api_create_menulist(request):
-    records_data = []
-    for key in request.data.keys():
-        if key.startswith("records["):
-            index, field = key.split("[")[1].split("].")
-            index = int(index)  # Convert index to integer
-
-            # Initialize a new dictionary or update existing
-            while index >= len(records_data):
-                records_data.append({})
-            records_data[index][field] = request.data[key]
-
-    # Include the images data in the request data
-    request_data = {
-        "name": request.data.get("name"),
-        "meta": request.data.get("meta"),
-        "records": records_data,
-    }
-
-    # Handle POST request
-    serializer = MenuListSerializer(data=request_data)
+    """
+    Create a menu list from a form with ``name``, ``meta`` and ``records[<index>].<field>`` keys.
+    """
+    data = request.data.copy()
+    data.setdefault("records", [])
+    serializer = MenuListSerializer(data=data)
     if serializer.is_valid():
         serializer.save()
 
@@ -125,17 +222,83 @@ def api_create_menulist(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@renderer_classes(api_renderer_classes())
+@parser_classes([NestedMultiPartParser])
+def api_import(request):
+    """
+    Create many products and menu lists at once from NDJSON, one object per line (see
+    ``api.importer.import_catalog``). Send it as the request body with ``Content-Type:
+    application/x-ndjson``, or as the ``catalog`` file of a multipart request whose other files
+    are the images, referenced by their field name. Thumbnails are made afterwards, by the
+    ``process_images`` workers.
+    """
+    if request.content_type.startswith("multipart/"):
+        catalog = request.FILES.get("catalog")
+        if catalog is None:
+            return Response({"error": "Send the NDJSON as a file named catalog"}, status=status.HTTP_400_BAD_REQUEST)
+        lines, open_file = catalog, request.FILES.get
+    else:
+        # Read the body line by line rather than through a parser.
+        lines, open_file = request.stream or [], None
+
+    try:
+        summary = import_catalog(lines, open_file)
+    except ImportFailed as error:
+        logger.warning(f"Import rejected: {error}")
+        return Response(error.errors, status=status.HTTP_400_BAD_REQUEST)
+    logger.info(f"Imported {summary['products']} products and {summary['menu_lists']} menu lists")
+    return Response(summary, status=status.HTTP_201_CREATED)
+
+
 @api_view(["GET"])
-def api_drop_down_menu(request):
-    dropdown_menus = DropDownMenu.objects.all()
-    serializer = DropDownMenuSerializer(dropdown_menus.first())
-    body_response = {"body": serializer.data["data"]}
-    return Response(body_response)
+@renderer_classes(api_renderer_classes())
+def api_drop_down_menu(request, name=DEFAULT_MENU):
+    """
+    A drop down menu as stored, pre-encoded. The response carries the menu's ``X-Menu-Version``;
+    requests that pass the current one as ``?v=`` get a response that may be cached for a year,
+    everything else may be cached for API_DROP_DOWN_MENU_MAX_AGE seconds and then revalidated.
+    """
+    entry = get_menu_entry(name)
+    if entry is None:
+        return Response({"error": f"No drop down menu named {name}"}, status=status.HTTP_404_NOT_FOUND)
+
+    response = not_modified(request, entry["etag"], entry["last_modified"])
+    if response is None:
+        response = Response(PreEncoded(entry["content"]))
+
+    if request.query_params.get("v") == entry["version"]:
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.API_DROP_DOWN_MENU_MAX_AGE)
+    response["X-Menu-Version"] = entry["version"]
+    return set_validators(response, entry["etag"], entry["last_modified"])
 
 
 @api_view(["GET"])
+@renderer_classes(api_renderer_classes())
 def api_landing_page_images(request):
-    landing_page_image = LandingPageImage.objects.all().order_by("?").first()
-    serializer = LandingPageImageSerializer(landing_page_image)
-    body_response = {"body": serializer.data}
-    return Response(body_response)
+    """
+    A random landing page image, or with ``?mode=hourly`` the image of the current hour, which
+    is the same for every visitor and may be cached by a CDN until the hour is over.
+    """
+    pool = get_pool()
+    if request.query_params.get("mode") == "hourly":
+        now = timezone.now()
+        pk = pick_for_hour(pool, now)
+        max_age = 3600 - int(now.timestamp()) % 3600
+    else:
+        pk, max_age = pick_random(pool), None
+
+    # A pk the pool still holds for an image deleted a moment ago is answered as an empty pool.
+    picked = get_image(pk) if pk is not None else None
+    if picked is None:
+        return Response({"body": LandingPageImageSerializer(None).data})
+
+    etag = make_etag("landingpageimage", picked["pk"], picked["updated_on"])
+    response = not_modified(request, etag, picked["updated_on"])
+    if response is None:
+        response = Response({"body": picked["body"]})
+    if max_age is not None:
+        patch_cache_control(response, public=True, max_age=max_age)
+    return set_validators(response, etag, picked["updated_on"])
@@ -160,6 +160,8 @@ STATICFILES_FINDERS = [
 MEDIA_ROOT = str(APPS_DIR / "media")
 # https://docs.djangoproject.com/en/dev/ref/settings/#media-url
 MEDIA_URL = "/media/"
+# https://docs.djangoproject.com/en/dev/ref/settings/#file-upload-handlers
+FILE_UPLOAD_HANDLERS = ["api.uploads.HashingTemporaryFileUploadHandler"]
 
 # TEMPLATES
 # ------------------------------------------------------------------------------
@@ -306,3 +308,43 @@ SPECTACULAR_SETTINGS = {
 # ------------------------------------------------------------------------------
 
 DJANGO_SETTINGS_MODULE = env("DJANGO_SETTINGS_MODULE", default="config.settings.local")
+
+# API
+# ------------------------------------------------------------------------------
+# Seconds a serialized api_response body stays cached; saves and deletes invalidate it sooner.
+API_CACHE_TIMEOUT = env.int("API_CACHE_TIMEOUT", default=60 * 60 * 24)
+# Most slugs a single /api/_batch/ request may read.
+API_BATCH_MAX_SLUGS = env.int("API_BATCH_MAX_SLUGS", default=100)
+# Deepest /api/_tree/ walk a request may ask for, and the default depth.
+API_TREE_MAX_DEPTH = env.int("API_TREE_MAX_DEPTH", default=10)
+# Seconds clients and CDNs may reuse an unversioned /api/drop-down-menu response before revalidating.
+API_DROP_DOWN_MENU_MAX_AGE = env.int("API_DROP_DOWN_MENU_MAX_AGE", default=60 * 5)
+# Renderer for the api app's JSON responses and stored payloads. It must accept api.renderers.PreEncoded
+# values; FastJSONRenderer uses orjson when installed and the standard library otherwise.
+API_JSON_RENDERER = env("API_JSON_RENDERER", default="api.renderers.FastJSONRenderer")
+# Most products and menu lists a single /api/_import/ request or import_catalog run may create.
+API_IMPORT_MAX_ITEMS = env.int("API_IMPORT_MAX_ITEMS", default=1000)
+# Most images or records one form may send, as images[<index>].<field> keys with an index below this.
+API_FORM_MAX_ITEMS = env.int("API_FORM_MAX_ITEMS", default=100)
+# Make thumbnails when the transaction commits instead of queueing them in Redis for process_images.
+API_IMAGE_PROCESSING_INLINE = env.bool("API_IMAGE_PROCESSING_INLINE", default=False)
+# Widths and formats of the resized copies made of every image (see api.derivatives). "avif" needs a
+# Pillow with an AVIF encoder, such as pillow-avif-plugin; formats Pillow can't write are skipped
+# with a warning.
+API_IMAGE_DERIVATIVE_WIDTHS = env.list("API_IMAGE_DERIVATIVE_WIDTHS", cast=int, default=[480, 960, 1600])
+API_IMAGE_DERIVATIVE_FORMATS = env.list("API_IMAGE_DERIVATIVE_FORMATS", default=["webp"])
+# Widths of the menu list tiles made of every MenuListItem image, in the same formats.
+API_MENU_TILE_WIDTHS = env.list("API_MENU_TILE_WIDTHS", cast=int, default=[240, 480, 720])
+# Seconds an image may stay in processing before process_images --requeue takes its worker to have
+# stopped and queues it again; keep it well above the time the largest image takes.
+API_IMAGE_PROCESSING_TIMEOUT = env.int("API_IMAGE_PROCESSING_TIMEOUT", default=60 * 30)
+# Threads a process_images worker uses by default.
+API_IMAGE_WORKERS = env.int("API_IMAGE_WORKERS", default=4)
+# Most pixels an image may decode to for processing, after JPEGs are scaled down as they decode;
+# larger images are marked failed rather than risk a worker's memory.
+API_IMAGE_MAX_PIXELS = env.int("API_IMAGE_MAX_PIXELS", default=50_000_000)
+# Where CDN invalidations go; production and staging use api.cdn.CloudFrontBackend.
+API_CDN_BACKEND = env("API_CDN_BACKEND", default="api.cdn.DryRunBackend")
+# Name uploaded images and thumbnails by the hash of their content, so a URL always serves the same
+# bytes and can be cached for good; existing files are moved over by rename_images_by_hash.
+API_CONTENT_HASH_NAMES = env.bool("API_CONTENT_HASH_NAMES", default=False)
@@ -54,3 +54,5 @@ INSTALLED_APPS += ["django_extensions"]  # noqa: F405
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# There is no Redis queue here, so make thumbnails as soon as the transaction commits.
+API_IMAGE_PROCESSING_INLINE = True
@@ -1,5 +1,7 @@
 import sentry_sdk
+from boto3.s3.transfer import TransferConfig
 from boto3.session import Session
+
 from .base import *  # noqa
 from .base import env
 
@@ -70,9 +72,17 @@ AWS_S3_OBJECT_PARAMETERS = {
     "CacheControl": f"max-age={_AWS_EXPIRY}, s-maxage={_AWS_EXPIRY}, must-revalidate",
 }
 # https://django-storages.readthedocs.io/en/latest/backends/amazon-S3.html#settings
+# Files read back from S3, such as originals being thumbnailed, spill to disk past this size.
 AWS_S3_MAX_MEMORY_SIZE = env.int(
     "DJANGO_AWS_S3_MAX_MEMORY_SIZE",
-    default=100_000_000,  # 100MB
+    default=5_000_000,  # 5MB
+)
+# https://django-storages.readthedocs.io/en/latest/backends/amazon-S3.html#settings
+# Uploads stream from their spooled file in multipart chunks, at most max_concurrency of them in memory at once.
+AWS_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=env.int("DJANGO_AWS_S3_MULTIPART_THRESHOLD", default=8 * 2**20),
+    multipart_chunksize=env.int("DJANGO_AWS_S3_MULTIPART_CHUNKSIZE", default=8 * 2**20),
+    max_concurrency=env.int("DJANGO_AWS_S3_MAX_CONCURRENCY", default=4),
 )
 # https://django-storages.readthedocs.io/en/latest/backends/amazon-S3.html#settings
 AWS_S3_REGION_NAME = env("DJANGO_AWS_S3_REGION_NAME", default=None)
@@ -84,7 +94,7 @@ aws_s3_media = AWS_S3_CUSTOM_DOMAIN or f"{AWS_MEDIA_BUCKET_NAME}.s3.amazonaws.co
 # ------------------------
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        "BACKEND": "api.storage.MediaS3Storage",
         "OPTIONS": {
             "bucket_name": AWS_MEDIA_BUCKET_NAME,
             "location": "",
@@ -152,6 +162,7 @@ SPECTACULAR_SETTINGS["SERVERS"] = [  # noqa: F405
 # Your stuff...
 # ------------------------------------------------------------------------------
 CLOUDFLARE_DISTRIBUTION_ID = env("CLOUDFLARE_DISTRIBUTION_ID", None)
+API_CDN_BACKEND = env("API_CDN_BACKEND", default="api.cdn.CloudFrontBackend")
 SENTRY_ENV_DSN = env("DJANGO_SENTRY_ENV_DSN", None)
 
 if SENTRY_ENV_DSN:
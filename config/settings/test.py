@@ -35,3 +35,5 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore # noqa: F405
 MEDIA_URL = "http://media.testserver"
 # Your stuff...
 # ------------------------------------------------------------------------------
+# There is no Redis queue here, so make thumbnails as soon as the transaction commits.
+API_IMAGE_PROCESSING_INLINE = True
@@ -3,3 +3,5 @@ git pull origin production
 sudo docker compose -f production.yml down
 sudo docker compose -f production.yml up --build -d
 sudo docker compose -f production.yml run --rm django python manage.py migrate
+# The image worker started before the migrations ran, so restart it on the new schema.
+sudo docker compose -f production.yml restart images
@@ -3,3 +3,5 @@ git pull origin staging
 sudo docker compose -f staging.yml down
 sudo docker compose -f staging.yml up --build -d
 sudo docker compose -f staging.yml run --rm django python manage.py migrate
+# The image worker started before the migrations ran, so restart it on the new schema.
+sudo docker compose -f staging.yml restart images